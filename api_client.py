@@ -1,27 +1,58 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import gzip
 import json
+import math
 import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import sqlite3
+import operator
 import os
+import queue
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional
 import logging
 # Add this import to your api_client.py
 from config import standardize_league_name
+from schema import ensure_schema
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib decoder still works
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _loads(payload: bytes):
+    """Decode a JSON body straight from bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+# Fields every usable result event must carry, fetched in one C-level call
+_get_required_fields = operator.itemgetter('homeTeamName', 'awayTeamName', 'setScore')
+
 class VirtualFootballAPI:
     """API client for SportyBet Virtual Football data"""
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         self.base_url = "https://www.sportybet.com/api/ng/factsCenter/eventResultList"
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Keep connections alive across pages/leagues and retry transient failures
+        adapter = HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
         self.existing_matches = set()  # Store unique match keys for duplicate detection
         
         # League mappings based on your APIs
@@ -35,6 +66,88 @@ class VirtualFootballAPI:
         
         self.sport_id = 'sr:sport:202120001'  # Virtual Football
         
+        # Bound in-flight requests and request rate now that leagues are fetched concurrently
+        self.max_concurrency = 8
+        self.max_per_second = 5
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
+        # Parsed pages keyed by (league, day, days_back, page, page_size). Today's
+        # results keep growing, so entries go stale after a short TTL; stale
+        # entries keep their ETag so the next fetch can be a conditional GET
+        self.cache_ttl = 60
+        self.cache_maxsize = 1024
+        self._page_cache = OrderedDict()  # key -> (expires_at, etag, data)
+        self._cache_lock = threading.Lock()
+        
+        # Optional on-disk copy of each page so a re-run (e.g. after a crash
+        # between fetch and save) can skip HTTP entirely
+        self.cache_dir = cache_dir
+        self.disk_cache_ttl = 600
+        
+    def _cache_get(self, key: tuple) -> Optional[tuple]:
+        """Return the cached (expires_at, etag, data) entry for a page, fresh or stale"""
+        with self._cache_lock:
+            entry = self._page_cache.get(key)
+            if entry is not None:
+                self._page_cache.move_to_end(key)
+            return entry
+    
+    def _cache_put(self, key: tuple, data: Dict, etag: Optional[str] = None):
+        """Store a parsed page, evicting the least recently used entries"""
+        with self._cache_lock:
+            self._page_cache[key] = (time.monotonic() + self.cache_ttl, etag, data)
+            self._page_cache.move_to_end(key)
+            while len(self._page_cache) > self.cache_maxsize:
+                self._page_cache.popitem(last=False)
+    
+    def _disk_cache_path(self, key: tuple) -> str:
+        """Path of the on-disk copy of a cached page"""
+        league, day, days_back, page_num, page_size = key
+        return os.path.join(self.cache_dir, league, day,
+                            f"page_{page_num}_{page_size}_{days_back}.json.gz")
+    
+    def _disk_cache_get(self, key: tuple) -> Optional[Dict]:
+        """Load a page saved by an earlier run if it is younger than disk_cache_ttl"""
+        if not self.cache_dir:
+            return None
+        path = self._disk_cache_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_cache_ttl:
+                return None
+            with gzip.open(path, 'rb') as f:
+                return _loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache file %s: %s", path, e)
+            return None
+    
+    def _disk_cache_put(self, key: tuple, data: Dict):
+        """Write a page to the on-disk cache"""
+        if not self.cache_dir:
+            return
+        path = self._disk_cache_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = orjson.dumps(data) if orjson is not None else json.dumps(data).encode('utf-8')
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb', compresslevel=3) as f:
+                f.write(payload)
+            os.replace(tmp_path, path)  # atomic, so concurrent readers never see a partial file
+        except OSError as e:
+            logger.warning("Could not write cache file %s: %s", path, e)
+    
+    def _throttle(self):
+        """Block until the next request fits within max_per_second"""
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + 1.0 / self.max_per_second
+        if wait > 0:
+            time.sleep(wait)
+    
     def get_time_range(self, days_back: int = 0) -> tuple:
         """Get time range for API calls - default to today only"""
         if days_back == 0:
@@ -57,10 +170,28 @@ class VirtualFootballAPI:
                            page_num: int = 1, page_size: int = 100) -> Optional[Dict]:
         """Fetch matches for a specific league and page"""
         if league_name.lower() not in self.leagues:
-            logger.error(f"Unknown league: {league_name}")
+            logger.error("Unknown league: %s", league_name)
             return None
             
         category_id = self.leagues[league_name.lower()]
+        
+        cache_key = (league_name.lower(), date.today().isoformat(), days_back, page_num, page_size)
+        cached = self._cache_get(cache_key)
+        headers = {}
+        if cached is not None:
+            expires_at, etag, cached_data = cached
+            if expires_at >= time.monotonic():
+                logger.info("Cache hit for %s page %s", league_name, page_num)
+                return cached_data
+            if etag:
+                headers['If-None-Match'] = etag
+        else:
+            disk_data = self._disk_cache_get(cache_key)
+            if disk_data is not None:
+                logger.info("Disk cache hit for %s page %s", league_name, page_num)
+                self._cache_put(cache_key, disk_data)
+                return disk_data
+        
         start_time, end_time, current_time = self.get_time_range(days_back)
         
         params = {
@@ -74,154 +205,130 @@ class VirtualFootballAPI:
         }
         
         try:
-            logger.info(f"Fetching {league_name} matches (page {page_num})...")
-            response = self.session.get(self.base_url, params=params, timeout=30)
+            logger.info("Fetching %s matches (page %s)...", league_name, page_num)
+            with self._request_slots:
+                self._throttle()
+                response = self.session.get(self.base_url, params=params, headers=headers, timeout=(5, 30))
+            
+            if response.status_code == 304:
+                logger.info("%s page %s not modified, reusing cached body", league_name, page_num)
+                self._cache_put(cache_key, cached_data, etag)
+                return cached_data
+            
             response.raise_for_status()
             
-            data = response.json()
+            data = _loads(response.content)
             if data.get('bizCode') == 10000:
-                logger.info(f"Successfully fetched {league_name} page {page_num}")
+                logger.info("Successfully fetched %s page %s", league_name, page_num)
+                self._cache_put(cache_key, data, response.headers.get('ETag'))
+                self._disk_cache_put(cache_key, data)
                 return data
             else:
-                logger.error(f"API error for {league_name} page {page_num}: {data.get('message', 'Unknown error')}")
+                logger.error("API error for %s page %s: %s", league_name, page_num, data.get('message', 'Unknown error'))
                 return None
                 
         except requests.RequestException as e:
-            logger.error(f"Network error fetching {league_name} page {page_num}: {e}")
+            logger.error("Network error fetching %s page %s: %s", league_name, page_num, e)
             return None
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error for {league_name} page {page_num}: {e}")
+            logger.error("JSON decode error for %s page %s: %s", league_name, page_num, e)
             return None
     
     def fetch_all_league_pages(self, league_name: str, days_back: int = 0, 
                               page_size: int = 100) -> List[Dict]:
-        """Fetch all pages for a specific league with duplicate detection"""
+        """Fetch all pages for a specific league, sizing the page count from totalNum"""
+        logger.info("Fetching %s - Page 1", league_name)
+        first_page = self.fetch_league_matches(league_name, days_back, 1, page_size)
+        
+        if not first_page:
+            logger.warning("No data returned for %s page 1", league_name)
+            return []
+        
+        if not first_page.get('data', {}).get('tournaments', []):
+            logger.info("No tournaments found in %s page 1", league_name)
+            return []
+        
+        # The first response already tells us how many pages exist, so the
+        # remaining pages can be requested together instead of probed one by one
+        total_available = first_page.get('data', {}).get('totalNum')
+        if total_available is None:
+            logger.warning("No totalNum for %s, only page 1 fetched", league_name)
+            num_pages = 1
+        else:
+            num_pages = max(1, math.ceil(total_available / page_size))
+        
+        league_pages = [first_page]
+        if num_pages > 1:
+            page_numbers = range(2, num_pages + 1)
+            logger.info("Fetching %s - Pages 2-%s", league_name, num_pages)
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                results = executor.map(
+                    lambda page_num: self.fetch_league_matches(league_name, days_back, page_num, page_size),
+                    page_numbers
+                )
+                for page_num, data in zip(page_numbers, results):
+                    if not data:
+                        logger.warning("No data returned for %s page %s", league_name, page_num)
+                        continue
+                    league_pages.append(data)
+        
+        # Safety net: drop events repeated across pages (results can shift
+        # between page requests while new matches finish)
         all_matches = []
-        page_num = 1
+        existing_matches = set()
         total_processed = 0
-        existing_matches = set()  # Track unique matches in this fetch
-        
-        while True:
-            logger.info(f"Fetching {league_name} - Page {page_num}")
-            data = self.fetch_league_matches(league_name, days_back, page_num, page_size)
-            
-            if not data:
-                logger.warning(f"No data returned for {league_name} page {page_num}")
-                break
-            
-            # Check if we have tournaments with events
-            tournaments = data.get('data', {}).get('tournaments', [])
-            if not tournaments:
-                logger.info(f"No tournaments found in {league_name} page {page_num}")
-                break
-            
-            # Process matches and count new ones
-            page_matches = 0
-            new_matches = 0
-            for tournament in tournaments:
-                events = tournament.get('events', [])
-                for event in events:
-                    match_key = f"{event.get('eventId', '')}_{event.get('estimateStartTime', '')}"
-                    if match_key in existing_matches:
-                        continue  # Skip duplicates
+        for data in league_pages:
+            tournaments = []
+            for tournament in data.get('data', {}).get('tournaments', []):
+                events = []
+                for event in tournament.get('events', []):
+                    # eventId is already unique, no need to build a composite key
+                    match_key = event.get('eventId')
+                    if not match_key or match_key in existing_matches:
+                        continue  # Skip duplicates and events without an id
                     existing_matches.add(match_key)
-                    page_matches += 1
-                    new_matches += 1
-            
-            if new_matches == 0:
-                logger.info(f"No new matches found in {league_name} page {page_num}")
-                break
-            
-            all_matches.append(data)
-            logger.info(f"Found {page_matches} matches ({new_matches} new) in {league_name} page {page_num}")
-            total_processed += new_matches
-            
-            # Check totalNum if available
-            total_available = data.get('data', {}).get('totalNum', float('inf'))
-            logger.info(f"Total processed: {total_processed}/{total_available}")
-            
-            if total_processed >= total_available:
-                logger.info(f"Reached total available matches for {league_name}")
-                break
-            
-            page_num += 1
-            time.sleep(0.5)  # Small delay between requests
+                    events.append(event)
+                tournaments.append({**tournament, 'events': events})
+                total_processed += len(events)
+            all_matches.append({**data, 'data': {**data.get('data', {}), 'tournaments': tournaments}})
         
-        logger.info(f"Fetched {len(all_matches)} pages for {league_name}, total {total_processed} matches")
+        logger.info("Fetched %s pages for %s, total %s/%s matches", len(all_matches), league_name, total_processed, total_available)
         return all_matches
     
-    def fetch_all_leagues(self, days_back: int = 0) -> Dict[str, List[Dict]]:
-        """Fetch data from all available leagues with full pagination"""
-        all_data = {}
+    def iter_all_leagues(self, days_back: int = 0):
+        """Yield (league_name, pages) for each league as soon as its fetch finishes"""
+        league_names = list(self.leagues.keys())
         
-        for league_name in self.leagues.keys():
-            logger.info(f"\n🏆 Starting to fetch {league_name.title()} League...")
-            league_pages = self.fetch_all_league_pages(league_name, days_back)
-            
-            if league_pages:
-                all_data[league_name] = league_pages
-                total_matches = 0
-                for page_data in league_pages:
-                    tournaments = page_data.get('data', {}).get('tournaments', [])
-                    for tournament in tournaments:
-                        total_matches += len(tournament.get('events', []))
-                logger.info(f"✅ {league_name.title()}: {len(league_pages)} pages, {total_matches} total matches")
-            else:
-                logger.warning(f"❌ No data found for {league_name}")
-            
-            time.sleep(1)  # Rate limiting between leagues
-            
-        return all_data
+        # Leagues are independent, so fetch them side by side; the request
+        # semaphore and throttle keep the API load bounded
+        with ThreadPoolExecutor(max_workers=len(league_names)) as executor:
+            futures = {
+                executor.submit(self.fetch_all_league_pages, name, days_back): name
+                for name in league_names
+            }
+            for future in as_completed(futures):
+                league_name = futures[future]
+                league_pages = future.result()
+                if league_pages:
+                    total_matches = 0
+                    for page_data in league_pages:
+                        tournaments = page_data.get('data', {}).get('tournaments', [])
+                        for tournament in tournaments:
+                            total_matches += len(tournament.get('events', []))
+                    logger.info("✅ %s: %s pages, %s total matches", league_name.title(), len(league_pages), total_matches)
+                    yield league_name, league_pages
+                else:
+                    logger.warning("❌ No data found for %s", league_name)
+    
+    def fetch_all_leagues(self, days_back: int = 0) -> Dict[str, List[Dict]]:
+        """Fetch data from all available leagues concurrently with full pagination"""
+        fetched = dict(self.iter_all_leagues(days_back))
+        # Keep the configured league order regardless of completion order
+        return {name: fetched[name] for name in self.leagues if name in fetched}
 
 class DataProcessor:
     """Process and structure match data"""
     
-    @staticmethod
-    def extract_match_info(event: Dict) -> Dict:
-        """Extract relevant information from a match event"""
-        try:
-            # Validate essential fields
-            if not event.get('homeTeamName') or not event.get('awayTeamName') or 'setScore' not in event:
-                logger.warning(f"Skipping invalid match: {event.get('eventId', 'unknown')} - Missing required fields")
-                return {}
-            
-            # Parse scores
-            set_score = event.get('setScore', '0:0').split(':')
-            home_score = int(set_score[0]) if len(set_score) >= 2 else 0
-            away_score = int(set_score[1]) if len(set_score) >= 2 else 0
-            
-            # Parse half-time scores if available
-            game_scores = event.get('gameScore', ['0:0'])
-            half_time_score = game_scores[0] if len(game_scores) > 0 else '0:0'
-            ht_parts = half_time_score.split(':')
-            ht_home = int(ht_parts[0]) if len(ht_parts) >= 2 else 0
-            ht_away = int(ht_parts[1]) if len(ht_parts) >= 2 else 0
-            
-            match_info = {
-                'event_id': event.get('eventId', ''),
-                'game_id': event.get('gameId', ''),
-                'home_team': event.get('homeTeamName', ''),
-                'away_team': event.get('awayTeamName', ''),
-                'home_score': home_score,
-                'away_score': away_score,
-                'total_goals': home_score + away_score,
-                'ht_home_score': ht_home,
-                'ht_away_score': ht_away,
-                'ht_total_goals': ht_home + ht_away,
-                'start_time': event.get('estimateStartTime', 0),
-                'match_status': event.get('matchStatus', 'Unknown'),
-                'league': standardize_league_name(event.get('sport', {}).get('category', {}).get('name', 'Unknown')),
-                'result': DataProcessor._get_match_result(home_score, away_score),
-                'over_under_2_5': 'Over' if (home_score + away_score) > 2.5 else 'Under',
-                'both_teams_scored': 'Yes' if (home_score > 0 and away_score > 0) else 'No'
-            }
-            
-            logger.debug(f"Processed match: {match_info['home_team']} vs {match_info['away_team']} ({match_info['home_score']}:{match_info['away_score']})")
-            return match_info
-        except Exception as e:
-            logger.error(f"Error extracting match info for event {event.get('eventId', 'unknown')}: {e}")
-            return {}
-    
     @staticmethod
     def _get_match_result(home_score: int, away_score: int) -> str:
         """Determine match result (1/X/2)"""
@@ -234,59 +341,60 @@ class DataProcessor:
     
     @staticmethod
     def process_league_pages(league_pages: List[Dict]) -> List[Dict]:
-        """Process all pages of matches for a league"""
-        all_matches = []
-        
+        """Process all pages of matches for a league in a single pass over the events"""
         try:
-            for page_data in league_pages:
-                tournaments = page_data.get('data', {}).get('tournaments', [])
-                
-                for tournament in tournaments:
-                    events = tournament.get('events', [])
-                    
-                    for event in events:
-                        match_info = DataProcessor.extract_match_info(event)
-                        if match_info:
-                            all_matches.append(match_info)
-                            
+            events = (
+                event
+                for page_data in league_pages
+                for tournament in page_data.get('data', {}).get('tournaments', [])
+                for event in tournament.get('events', [])
+            )
+            # map() keeps the per-event call in C; empty dicts mark skipped events
+            return [match_info for match_info in map(DataProcessor.extract_match_info, events) if match_info]
         except Exception as e:
-            logger.error(f"Error processing league pages: {e}")
-            
-        return all_matches
-    # Then update your DataProcessor.extract_match_info method:
+            logger.error("Error processing league pages: %s", e)
+            return []
+    
     @staticmethod
     def extract_match_info(event: Dict) -> Dict:
         """Extract relevant information from a match event"""
         try:
             # Validate essential fields
-            if not event.get('homeTeamName') or not event.get('awayTeamName') or 'setScore' not in event:
-                logger.warning(f"Skipping invalid match: {event.get('eventId', 'unknown')} - Missing required fields")
+            try:
+                home_team, away_team, set_score = _get_required_fields(event)
+            except KeyError:
+                home_team = away_team = None
+            if not home_team or not away_team:
+                logger.warning("Skipping invalid match: %s - Missing required fields", event.get('eventId', 'unknown'))
                 return {}
             
             # Parse scores
-            set_score = event.get('setScore', '0:0').split(':')
+            set_score = set_score.split(':')
             home_score = int(set_score[0]) if len(set_score) >= 2 else 0
             away_score = int(set_score[1]) if len(set_score) >= 2 else 0
             
             # Parse half-time scores if available
-            game_scores = event.get('gameScore', ['0:0'])
-            half_time_score = game_scores[0] if len(game_scores) > 0 else '0:0'
-            ht_parts = half_time_score.split(':')
+            game_scores = event.get('gameScore') or ['0:0']
+            ht_parts = game_scores[0].split(':')
             ht_home = int(ht_parts[0]) if len(ht_parts) >= 2 else 0
             ht_away = int(ht_parts[1]) if len(ht_parts) >= 2 else 0
             
             # Get raw league name and standardize it
-            raw_league_name = event.get('sport', {}).get('category', {}).get('name', 'Unknown')
+            try:
+                raw_league_name = event['sport']['category']['name']
+            except (KeyError, TypeError):
+                raw_league_name = 'Unknown'
             standardized_league_name = standardize_league_name(raw_league_name)
             
+            total_goals = home_score + away_score
             match_info = {
                 'event_id': event.get('eventId', ''),
                 'game_id': event.get('gameId', ''),
-                'home_team': event.get('homeTeamName', ''),
-                'away_team': event.get('awayTeamName', ''),
+                'home_team': home_team,
+                'away_team': away_team,
                 'home_score': home_score,
                 'away_score': away_score,
-                'total_goals': home_score + away_score,
+                'total_goals': total_goals,
                 'ht_home_score': ht_home,
                 'ht_away_score': ht_away,
                 'ht_total_goals': ht_home + ht_away,
@@ -294,16 +402,27 @@ class DataProcessor:
                 'match_status': event.get('matchStatus', 'Unknown'),
                 'league': standardized_league_name,  # Now uses standardized name
                 'result': DataProcessor._get_match_result(home_score, away_score),
-                'over_under_2_5': 'Over' if (home_score + away_score) > 2.5 else 'Under',
-                'both_teams_scored': 'Yes' if (home_score > 0 and away_score > 0) else 'No'
+                'over_under_2_5': total_goals > 2,  # stored as 1/0, rendered as Over/Under by the UI
+                'both_teams_scored': home_score > 0 and away_score > 0
             }
             
-            logger.debug(f"Processed match: {match_info['home_team']} vs {match_info['away_team']} ({match_info['home_score']}:{match_info['away_score']}) - {standardized_league_name}")
+            logger.debug("Processed match: %s vs %s (%s:%s) - %s", match_info['home_team'], match_info['away_team'], match_info['home_score'], match_info['away_score'], standardized_league_name)
             return match_info
         except Exception as e:
-            logger.error(f"Error extracting match info for event {event.get('eventId', 'unknown')}: {e}")
+            logger.error("Error extracting match info for event %s: %s", event.get('eventId', 'unknown'), e)
             return {}
 
+# Sign of (home_score - away_score) -> (home column, away column, home points,
+# away points, home form letter, away form letter)
+_RESULT_UPDATES = {
+    1: ('wins', 'losses', 3, 0, 'W', 'L'),
+    -1: ('losses', 'wins', 0, 3, 'L', 'W'),
+    0: ('draws', 'draws', 1, 1, 'D', 'D'),
+}
+
+# Built in C, so sorting a table never calls back into a Python lambda
+_TABLE_SORT_KEY = operator.itemgetter('points', 'goal_difference', 'goals_for')
+
 class LeagueTableGenerator:
     """Generate league tables from match data - FIXED VERSION"""
     
@@ -312,75 +431,73 @@ class LeagueTableGenerator:
         # Don't use expected_teams for initialization - only use actual match data
         self.expected_teams = expected_teams or []
     
+    def reset(self):
+        """Forget all team statistics so the generator can be reused for another league"""
+        self.team_stats.clear()
+    
+    def _get_team_stats(self, team: str) -> Dict:
+        """Return the stats row for a team, creating it on first appearance"""
+        stats = self.team_stats.get(team)
+        if stats is None:
+            stats = self.team_stats[team] = {
+                'team_name': team,
+                'matches_played': 0,
+                'wins': 0,
+                'draws': 0,
+                'losses': 0,
+                'goals_for': 0,
+                'goals_against': 0,
+                'goal_difference': 0,
+                'points': 0,
+                'home_matches': 0,
+                'away_matches': 0,
+                'last_5_results': deque(maxlen=5)
+            }
+        return stats
+    
+    def add_matches(self, matches: List[Dict]):
+        """Add a batch of match results to team statistics"""
+        add_match = self.add_match
+        for match in matches:
+            add_match(match)
+    
     def add_match(self, match: Dict):
         """Add a match result to team statistics"""
         home_team = match['home_team']
         away_team = match['away_team']
         
         if not home_team or not away_team:
-            logger.warning(f"Skipping match with missing teams: {match.get('event_id', 'unknown')}")
+            logger.warning("Skipping match with missing teams: %s", match.get('event_id', 'unknown'))
             return
         
         home_score = match['home_score']
         away_score = match['away_score']
         
         # Initialize teams ONLY when they appear in actual matches
-        for team in [home_team, away_team]:
-            if team not in self.team_stats:
-                self.team_stats[team] = {
-                    'team_name': team,
-                    'matches_played': 0,
-                    'wins': 0,
-                    'draws': 0,
-                    'losses': 0,
-                    'goals_for': 0,
-                    'goals_against': 0,
-                    'goal_difference': 0,
-                    'points': 0,
-                    'home_matches': 0,
-                    'away_matches': 0,
-                    'last_5_results': []
-                }
+        home_stats = self._get_team_stats(home_team)
+        away_stats = self._get_team_stats(away_team)
         
         # Update home team stats
-        home_stats = self.team_stats[home_team]
         home_stats['matches_played'] += 1
         home_stats['home_matches'] += 1
         home_stats['goals_for'] += home_score
         home_stats['goals_against'] += away_score
         
         # Update away team stats
-        away_stats = self.team_stats[away_team]
         away_stats['matches_played'] += 1
         away_stats['away_matches'] += 1
         away_stats['goals_for'] += away_score
         away_stats['goals_against'] += home_score
         
-        # Determine result and update accordingly
-        if home_score > away_score:  # Home win
-            home_stats['wins'] += 1
-            home_stats['points'] += 3
-            away_stats['losses'] += 1
-            home_stats['last_5_results'].append('W')
-            away_stats['last_5_results'].append('L')
-        elif away_score > home_score:  # Away win
-            away_stats['wins'] += 1
-            away_stats['points'] += 3
-            home_stats['losses'] += 1
-            home_stats['last_5_results'].append('L')
-            away_stats['last_5_results'].append('W')
-        else:  # Draw
-            home_stats['draws'] += 1
-            home_stats['points'] += 1
-            away_stats['draws'] += 1
-            away_stats['points'] += 1
-            home_stats['last_5_results'].append('D')
-            away_stats['last_5_results'].append('D')
-        
-        # Keep only last 5 results
-        for team_stats in [home_stats, away_stats]:
-            if len(team_stats['last_5_results']) > 5:
-                team_stats['last_5_results'] = team_stats['last_5_results'][-5:]
+        # One table lookup replaces the win/loss/draw branches
+        home_key, away_key, home_points, away_points, home_form, away_form = \
+            _RESULT_UPDATES[(home_score > away_score) - (home_score < away_score)]
+        home_stats[home_key] += 1
+        away_stats[away_key] += 1
+        home_stats['points'] += home_points
+        away_stats['points'] += away_points
+        home_stats['last_5_results'].append(home_form)
+        away_stats['last_5_results'].append(away_form)
     
     def generate_table(self) -> List[Dict]:
         """Generate sorted league table from ACTUAL match data only"""
@@ -390,60 +507,82 @@ class LeagueTableGenerator:
             stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
         
         # Sort teams by points (desc), then goal difference (desc), then goals for (desc)
-        sorted_teams = sorted(
-            self.team_stats.values(),
-            key=lambda x: (x['points'], x['goal_difference'], x['goals_for']),
-            reverse=True
-        )
+        sorted_teams = sorted(self.team_stats.values(), key=_TABLE_SORT_KEY, reverse=True)
         
         # Add position
         for i, team in enumerate(sorted_teams, 1):
             team['position'] = i
             
         # Log the final table for debugging
-        logger.info(f"Generated table with {len(sorted_teams)} teams")
+        logger.info("Generated table with %s teams", len(sorted_teams))
         match_counts = [team['matches_played'] for team in sorted_teams]
         if match_counts:
-            logger.info(f"Match count range: {min(match_counts)} - {max(match_counts)}")
+            logger.info("Match count range: %s - %s", min(match_counts), max(match_counts))
             
         return sorted_teams
 
 
+# Insert statements are kept as module constants so every save reuses the
+# exact same SQL text and hits sqlite3's per-connection statement cache
+_INSERT_MATCH_SQL = '''
+    INSERT OR REPLACE INTO matches 
+    (event_id, game_id, home_team, away_team, home_score, away_score,
+     total_goals, ht_home_score, ht_away_score, ht_total_goals,
+     start_time, match_status, league, result, over_under_2_5, both_teams_scored)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_INSERT_TABLE_SQL = '''
+    INSERT INTO league_tables 
+    (league_name, team_name, position, matches_played, wins, draws, losses,
+     goals_for, goals_against, goal_difference, points, last_5_results)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
 class DatabaseManager:
     """Manage SQLite database for storing match data and league tables"""
     
     def __init__(self, db_path: str = 'virtual_football.db'):
         self.db_path = db_path
+        # One long-lived connection per thread instead of a connect/close per call
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's cached connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL only needs fsync at checkpoints, so NORMAL is still crash-safe
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """Close every connection opened by this manager"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error("Error closing database connection: %s", e)
+        self._local = threading.local()
+    
     def init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
+            # journal_mode is persisted in the database file, so setting it once is enough
+            cursor.execute('PRAGMA journal_mode=WAL')
             
-            # Matches table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS matches (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_id TEXT UNIQUE,
-                    game_id TEXT,
-                    home_team TEXT,
-                    away_team TEXT,
-                    home_score INTEGER,
-                    away_score INTEGER,
-                    total_goals INTEGER,
-                    ht_home_score INTEGER,
-                    ht_away_score INTEGER,
-                    ht_total_goals INTEGER,
-                    start_time INTEGER,
-                    match_status TEXT,
-                    league TEXT,
-                    result TEXT,
-                    over_under_2_5 TEXT,
-                    both_teams_scored TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # matches and the tables the predictor reads alongside it
+            ensure_schema(cursor)
             
             # League tables
             cursor.execute('''
@@ -470,88 +609,101 @@ class DatabaseManager:
             logger.info("Database initialized successfully")
     
     def save_matches(self, matches: List[Dict], league_name: str):
-        """Save matches to database"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Save matches to database in a single batched transaction"""
+        rows = [
+            (
+                match['event_id'], match['game_id'], match['home_team'], 
+                match['away_team'], match['home_score'], match['away_score'],
+                match['total_goals'], match['ht_home_score'], match['ht_away_score'],
+                match['ht_total_goals'], match['start_time'], match['match_status'],
+                league_name, match['result'], match['over_under_2_5'], match['both_teams_scored']
+            )
+            for match in matches
+        ]
+        
+        with self._connect() as conn:
             cursor = conn.cursor()
-            
-            saved_count = 0
-            for match in matches:
-                try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO matches 
-                        (event_id, game_id, home_team, away_team, home_score, away_score,
-                         total_goals, ht_home_score, ht_away_score, ht_total_goals,
-                         start_time, match_status, league, result, over_under_2_5, both_teams_scored)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        match['event_id'], match['game_id'], match['home_team'], 
-                        match['away_team'], match['home_score'], match['away_score'],
-                        match['total_goals'], match['ht_home_score'], match['ht_away_score'],
-                        match['ht_total_goals'], match['start_time'], match['match_status'],
-                        league_name, match['result'], match['over_under_2_5'], match['both_teams_scored']
-                    ))
-                    saved_count += 1
-                except Exception as e:
-                    logger.error(f"Error saving match {match.get('event_id', 'unknown')}: {e}")
-            
-            conn.commit()
-            logger.info(f"Saved {saved_count}/{len(matches)} matches for {league_name}")
+            try:
+                cursor.executemany(_INSERT_MATCH_SQL, rows)
+                conn.commit()
+                logger.info("Saved %s/%s matches for %s", len(rows), len(matches), league_name)
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error("Error saving matches for %s: %s", league_name, e)
     
     def save_league_table(self, table: List[Dict], league_name: str):
-        """Save league table to database"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Save league table to database in a single batched transaction"""
+        rows = [
+            (
+                league_name, team['team_name'], team['position'], team['matches_played'],
+                team['wins'], team['draws'], team['losses'], team['goals_for'],
+                team['goals_against'], team['goal_difference'], team['points'],
+                ','.join(team['last_5_results'])
+            )
+            for team in table
+        ]
+        
+        with self._connect() as conn:
             cursor = conn.cursor()
-            
-            # Clear existing table for this league
-            cursor.execute('DELETE FROM league_tables WHERE league_name = ?', (league_name,))
-            
-            for team in table:
-                try:
-                    cursor.execute('''
-                        INSERT INTO league_tables 
-                        (league_name, team_name, position, matches_played, wins, draws, losses,
-                         goals_for, goals_against, goal_difference, points, last_5_results)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        league_name, team['team_name'], team['position'], team['matches_played'],
-                        team['wins'], team['draws'], team['losses'], team['goals_for'],
-                        team['goals_against'], team['goal_difference'], team['points'],
-                        ','.join(team['last_5_results'])
-                    ))
-                except Exception as e:
-                    logger.error(f"Error saving team {team.get('team_name', 'unknown')}: {e}")
-            
-            conn.commit()
-            logger.info(f"Saved league table for {league_name}")
+            try:
+                # Clear existing table for this league; the delete and the inserts
+                # share one transaction so readers never see a half-written table
+                cursor.execute('DELETE FROM league_tables WHERE league_name = ?', (league_name,))
+                cursor.executemany(_INSERT_TABLE_SQL, rows)
+                conn.commit()
+                logger.info("Saved league table for %s", league_name)
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error("Error saving league table for %s: %s", league_name, e)
     
     def get_team_last_5_matches(self, team_name: str, league_name: str) -> List[Dict]:
         """Get last 5 matches for a team"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
+            # One indexed branch per side instead of an OR that forces a full scan
             cursor.execute('''
-                SELECT * FROM matches 
-                WHERE (home_team = ? OR away_team = ?) AND league = ?
+                SELECT * FROM (
+                    SELECT * FROM matches
+                    WHERE league = ? AND home_team = ?
+                    ORDER BY start_time DESC
+                    LIMIT 5
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT * FROM matches
+                    WHERE league = ? AND away_team = ?
+                    ORDER BY start_time DESC
+                    LIMIT 5
+                )
                 ORDER BY start_time DESC 
                 LIMIT 5
-            ''', (team_name, team_name, league_name))
+            ''', (league_name, team_name, league_name, team_name))
             
-            columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_head_to_head(self, team1: str, team2: str, league_name: str, limit: int = 10) -> List[Dict]:
         """Get head-to-head matches between two teams"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT * FROM matches 
-                WHERE ((home_team = ? AND away_team = ?) OR (home_team = ? AND away_team = ?))
-                AND league = ?
+                SELECT * FROM (
+                    SELECT * FROM matches
+                    WHERE league = ? AND home_team = ? AND away_team = ?
+                    ORDER BY start_time DESC
+                    LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT * FROM matches
+                    WHERE league = ? AND home_team = ? AND away_team = ?
+                    ORDER BY start_time DESC
+                    LIMIT ?
+                )
                 ORDER BY start_time DESC 
                 LIMIT ?
-            ''', (team1, team2, team2, team1, league_name, limit))
+            ''', (league_name, team1, team2, limit, league_name, team2, team1, limit, limit))
             
-            columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
 
 
 def main():
@@ -560,65 +712,83 @@ def main():
     print("=" * 60)
     print(f"📅 Fetching TODAY'S matches with complete pagination ({datetime.now().strftime('%Y-%m-%d')})")
     
-    # Initialize components
-    api_client = VirtualFootballAPI()
+    # Initialize components. The on-disk page cache is opt-in through
+    # VF_API_CACHE_DIR (e.g. .cache/api when resuming after a crash): today's
+    # results keep growing, so a normal run should fetch them fresh
+    api_client = VirtualFootballAPI(cache_dir=os.environ.get('VF_API_CACHE_DIR'))
     data_processor = DataProcessor()
     db_manager = DatabaseManager()
     
+    # Pipeline fetching and processing: the main thread fetches leagues while
+    # a single consumer thread parses them and owns all DB writes
+    league_queue = queue.Queue()
+    summary = {'leagues': 0, 'total_matches': 0}
+    
+    def consumer():
+        table_generator = LeagueTableGenerator()  # NO expected_teams parameter
+        while True:
+            item = league_queue.get()
+            if item is None:
+                break
+            league_name, league_pages = item
+            summary['leagues'] += 1
+            print(f"\n🏆 Processing {league_name.title()} League...")
+            
+            matches = data_processor.process_league_pages(league_pages)
+            
+            if not matches:
+                print(f"   ⚠️  No matches found for {league_name}")
+                continue
+            
+            # Save matches to database
+            db_manager.save_matches(matches, league_name)
+            
+            # Generate league table WITHOUT expected teams, reusing one generator
+            table_generator.reset()
+            table_generator.add_matches(matches)
+            
+            league_table = table_generator.generate_table()
+            db_manager.save_league_table(league_table, league_name)
+            
+            # Validate and report
+            if league_table:
+                match_counts = [team['matches_played'] for team in league_table]
+                print(f"   📊 Teams: {len(league_table)}, Match range: {min(match_counts)}-{max(match_counts)}")
+                summary['total_matches'] += sum(match_counts) / 2  # Each match counts for two teams
+            else:
+                print(f"   ❌ No league table generated for {league_name}")
+            
+            # Display all teams
+            print("   📋 League Table:")
+            for i, team in enumerate(league_table, 1):
+                last_5 = ','.join(team['last_5_results'])
+                print(f"      {i}. {team['team_name']} - {team['points']} pts "
+                      f"({team['matches_played']} matches, {team['wins']}W-{team['draws']}D-{team['losses']}L) "
+                      f"[Last 5: {last_5}]")
+    
+    consumer_thread = threading.Thread(target=consumer, name='league-consumer')
+    consumer_thread.start()
+    
     # Fetch data from all leagues (today only, all pages)
     print("📡 Fetching data from all leagues (all pages)...")
-    all_league_data = api_client.fetch_all_leagues(days_back=0)  # Today only
+    try:
+        for league_name, league_pages in api_client.iter_all_leagues(days_back=0):  # Today only
+            league_queue.put((league_name, league_pages))
+    finally:
+        league_queue.put(None)
+        consumer_thread.join()
     
-    if not all_league_data:
+    if not summary['leagues']:
         print("❌ No data fetched. Check API connectivity.")
+        db_manager.close()
         return
     
-    print(f"\n✅ Successfully fetched data from {len(all_league_data)} leagues")
-    
-    total_matches_all_leagues = 0
-    
-    # Process each league
-    for league_name, league_pages in all_league_data.items():
-        print(f"\n🏆 Processing {league_name.title()} League...")
-        
-        matches = data_processor.process_league_pages(league_pages)
-        
-        if not matches:
-            print(f"   ⚠️  No matches found for {league_name}")
-            continue
-        
-        # Save matches to database
-        db_manager.save_matches(matches, league_name)
-        
-        # Generate league table WITHOUT expected teams
-        table_generator = LeagueTableGenerator()  # NO expected_teams parameter
-        
-        for match in matches:
-            table_generator.add_match(match)
-        
-        league_table = table_generator.generate_table()
-        db_manager.save_league_table(league_table, league_name)
-        
-        # Validate and report
-        if league_table:
-            match_counts = [team['matches_played'] for team in league_table]
-            print(f"   📊 Teams: {len(league_table)}, Match range: {min(match_counts)}-{max(match_counts)}")
-            total_matches_all_leagues += sum(match_counts) / 2  # Each match counts for two teams
-        else:
-            print(f"   ❌ No league table generated for {league_name}")
-        
-        # Display all teams
-        print("   📋 League Table:")
-        for i, team in enumerate(league_table, 1):
-            last_5 = ','.join(team['last_5_results'][-5:])
-            print(f"      {i}. {team['team_name']} - {team['points']} pts "
-                  f"({team['matches_played']} matches, {team['wins']}W-{team['draws']}D-{team['losses']}L) "
-                  f"[Last 5: {last_5}]")
-    
     print(f"\n🎉 SUMMARY:")
-    print(f"   📊 Total matches processed: {int(total_matches_all_leagues)}")
-    print(f"   🏆 Leagues processed: {len(all_league_data)}")
+    print(f"   📊 Total matches processed: {int(summary['total_matches'])}")
+    print(f"   🏆 Leagues processed: {summary['leagues']}")
     print(f"   💾 Database: 'virtual_football.db'")
+    db_manager.close()
+    
     print(f"\n✅ Enhanced Phase 1 Complete with Full Pagination!")
     print("📝 Next: Run the test script to verify everything works")
 
@@ -1,120 +1,269 @@
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, render_template, request
+from flask.json.provider import DefaultJSONProvider
+import functools
+from contextlib import contextmanager
+import hashlib
+import logging
 from predictor import Predictor
+from schema import ensure_schema
 import sqlite3
-from config import standardize_league_name, get_display_name
-import sqlite3
+from config import VIRTUAL_LEAGUES, standardize_league_name, get_display_name
 import os 
+import queue
+import requests
+import threading
 import time 
 
+try:
+    import orjson
+except ImportError:  # optional speedup; Flask's own encoder still works
+    orjson = None
+
+# Probed once per process; the working directory's permissions do not change
+# under a running app, so neither get_db_path nor /debug repeats the syscall
+_CWD_WRITABLE = os.access('.', os.W_OK)
+
 def get_db_path():
     """Get the correct database path based on environment."""
     # Check if we're on Vercel or other cloud platform where current dir isn't writable
-    if os.environ.get('VERCEL') or os.environ.get('VERCEL_ENV') or not os.access('.', os.W_OK):
+    if os.environ.get('VERCEL') or os.environ.get('VERCEL_ENV') or not _CWD_WRITABLE:
         # Use /tmp directory on Vercel (writable)
         return '/tmp/virtual_football.db'
     else:
         # Use current directory for local development
         return 'virtual_football.db'
 
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses with orjson.
+    
+    Routes return plain dicts and Flask hands them to app.json.response, so
+    this covers every dict response without touching the views.
+    """
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
+
 app = Flask(__name__, template_folder='templates', static_folder='static')
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 db_path = get_db_path()
 predictor = Predictor(db_path)
+logger = logging.getLogger(__name__)
+
+def _dumps(payload):
+    """Serialize payload to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return app.json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def _json_response(payload):
+    """Build a JSON response from a payload without the provider's extra checks."""
+    return Response(_dumps(payload), mimetype='application/json')
+
+# Serialized response bodies: {(builder name, args, cache version): (expires_at, body)}
+_cache = {}
+_cache_version = 0
+# Request threads share _cache; the lock covers lookups, pruning and inserts
+# (the builder itself runs outside it)
+_cache_lock = threading.Lock()
+_CACHE_MAX_ENTRIES = 256
+
+def cached(ttl):
+    """Memoize a payload builder for `ttl` seconds, keyed by its arguments.
+    
+    Entries are also keyed by _cache_version, so invalidate_cache() retires
+    everything built before a write.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (func.__name__, args, _cache_version)
+            now = time.monotonic()
+            with _cache_lock:
+                entry = _cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            
+            value = func(*args)
+            with _cache_lock:
+                if len(_cache) >= _CACHE_MAX_ENTRIES:
+                    # Arguments come from URLs, so keep the dict from growing without bound
+                    for stale_key in [k for k, (expires_at, _) in _cache.items() if expires_at <= now]:
+                        del _cache[stale_key]
+                    if len(_cache) >= _CACHE_MAX_ENTRIES:
+                        _cache.clear()
+                _cache[key] = (now + ttl, value)
+            return value
+        return wrapper
+    return decorator
+
+def invalidate_cache():
+    """Drop every cached payload and memoized prediction; call after writing to the database."""
+    global _cache_version
+    with _cache_lock:
+        _cache_version += 1
+        _cache.clear()
+    predictor.invalidate()
+
+def _connect():
+    """Open a database connection tuned for this app's read-heavy traffic."""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    # WAL is persisted in the file; re-asserting it also covers databases
+    # created by the fetcher scripts before the app ever started
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=5000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    # The whole database fits in these 64 MiB of page cache and the mmap
+    # window; with spilling off, the seed and alias writes keep their dirty
+    # pages in that cache until commit instead of writing them out early
+    conn.execute('PRAGMA cache_size=-65536')
+    conn.execute('PRAGMA cache_spill=OFF')
+    conn.execute('PRAGMA mmap_size=268435456')
+    return conn
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections shared by request threads.
+    
+    The dev server and threaded WSGI workers may start a new thread per
+    request, so per-thread connections would be opened and thrown away
+    constantly. Pooled connections are reused and keep their page cache warm.
+    """
+    
+    def __init__(self, size=8):
+        self.size = size
+        # LIFO hands out the most recently used, i.e. warmest, connection
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return _connect()
+        # Pool exhausted: wait for another request to hand one back
+        return self._idle.get()
+    
+    @contextmanager
+    def acquire(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self._checkout()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+    
+    def close(self):
+        """Close every idle connection; later requests open fresh ones."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+pool = ConnectionPool()
+
+def bulk_insert(cursor, table, columns, rows, batch=1000):
+    """Insert rows with executemany in batches of `batch`.
+    
+    Runs inside the caller's transaction; commit once after all inserts so
+    the whole load costs a single sync.
+    """
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    rows = list(rows)
+    for start in range(0, len(rows), batch):
+        cursor.executemany(sql, rows[start:start + batch])
+
+# The app's own tables and indexes, plus the planner check, run as one
+# script at startup after schema.ensure_schema has created the shared ones
+_SCHEMA_DDL = '''
+    -- Create league tables
+    CREATE TABLE IF NOT EXISTS league_tables (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        league_name TEXT,
+        team_name TEXT,
+        position INTEGER,
+        matches_played INTEGER,
+        wins INTEGER,
+        draws INTEGER,
+        losses INTEGER,
+        goals_for INTEGER,
+        goals_against INTEGER,
+        goal_difference INTEGER,
+        points INTEGER,
+        last_5_results TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(league_name, team_name)
+    );
+    
+    -- Raw league string -> standardized/display name, so /leagues can
+    -- group on the database side (see sync_league_aliases)
+    CREATE TABLE IF NOT EXISTS league_alias (
+        raw TEXT PRIMARY KEY,
+        standardized TEXT,
+        display TEXT
+    );
+    
+    -- Indexes for the app's own hot lookups; the shared ones are in schema.py
+    -- Newest-first scans for the /matches historical fallback
+    CREATE INDEX IF NOT EXISTS idx_matches_league_time
+    ON matches(league, start_time DESC);
+    CREATE INDEX IF NOT EXISTS idx_sched_league_status
+    ON scheduled_matches(league, status, home_team, away_team);
+    -- run.py's started/finished sweeps over a start_time window
+    CREATE INDEX IF NOT EXISTS idx_sched_status_start
+    ON scheduled_matches(status, start_time);
+    CREATE INDEX IF NOT EXISTS idx_lt_league_pos
+    ON league_tables(league_name, position);
+    -- Refresh planner statistics only where they are missing or stale; a
+    -- full ANALYZE here would rescan every table on each (cold) start
+    PRAGMA optimize=0x10002;
+'''
 
 # Initialize database tables on startup
 def init_database():
     """Initialize database tables if they don't exist."""
     try:
-        with sqlite3.connect(db_path) as conn:
+        with pool.acquire() as conn:
             cursor = conn.cursor()
             
-            # Create matches table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS matches (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_id TEXT UNIQUE,
-                    game_id TEXT,
-                    home_team TEXT,
-                    away_team TEXT,
-                    home_score INTEGER,
-                    away_score INTEGER,
-                    total_goals INTEGER,
-                    ht_home_score INTEGER,
-                    ht_away_score INTEGER,
-                    ht_total_goals INTEGER,
-                    start_time INTEGER,
-                    match_status TEXT,
-                    league TEXT,
-                    result TEXT,
-                    over_under_2_5 TEXT,
-                    both_teams_scored TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create league tables
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS league_tables (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    league_name TEXT,
-                    team_name TEXT,
-                    position INTEGER,
-                    matches_played INTEGER,
-                    wins INTEGER,
-                    draws INTEGER,
-                    losses INTEGER,
-                    goals_for INTEGER,
-                    goals_against INTEGER,
-                    goal_difference INTEGER,
-                    points INTEGER,
-                    last_5_results TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(league_name, team_name)
-                )
-            ''')
-            
-            # Create scheduled matches table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scheduled_matches (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_id TEXT UNIQUE,
-                    home_team TEXT,
-                    away_team TEXT,
-                    league TEXT,
-                    start_time INTEGER,
-                    match_time_display TEXT,
-                    status TEXT DEFAULT 'scheduled',
-                    home_odds REAL DEFAULT 1.0,
-                    draw_odds REAL DEFAULT 1.0,
-                    away_odds REAL DEFAULT 1.0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
+            # The tables the predictor shares with the fetchers, then one call
+            # for the rest; both commit, so there is nothing left to commit here
+            ensure_schema(cursor)
+            cursor.executescript(_SCHEMA_DDL)
             print(f"Database initialized successfully at: {db_path}")
             
-            # Add some sample data if tables are empty (for demo purposes)
+            # Add some sample data if tables are empty (for demo purposes).
+            # The check and both inserts share one write transaction, so there
+            # is a single commit and concurrent workers cannot both seed.
+            cursor.execute('BEGIN IMMEDIATE')
             cursor.execute('SELECT COUNT(*) FROM matches')
             if cursor.fetchone()[0] == 0:
                 print("Adding sample data for demo...")
                 sample_matches = [
-                    ('match1', 'game1', 'ARS', 'LEE', 2, 1, 3, 1, 0, 1, 1640995200000, 'FT', 'england virtual', '1', 'Over', 'No'),
-                    ('match2', 'game2', 'LEE', 'CHE', 1, 2, 3, 0, 1, 1, 1641081600000, 'FT', 'england virtual', '2', 'Over', 'Yes'),
-                    ('match3', 'game3', 'CHE', 'MCI', 0, 3, 3, 0, 2, 2, 1641168000000, 'FT', 'england virtual', '2', 'Over', 'No'),
-                    ('match4', 'game4', 'MCI', 'ARS', 2, 2, 4, 1, 1, 2, 1641254400000, 'FT', 'england virtual', 'X', 'Over', 'Yes'),
+                    ('match1', 'game1', 'ARS', 'LEE', 2, 1, 3, 1, 0, 1, 1640995200000, 'FT', 'england virtual', '1', 1, 0),
+                    ('match2', 'game2', 'LEE', 'CHE', 1, 2, 3, 0, 1, 1, 1641081600000, 'FT', 'england virtual', '2', 1, 1),
+                    ('match3', 'game3', 'CHE', 'MCI', 0, 3, 3, 0, 2, 2, 1641168000000, 'FT', 'england virtual', '2', 1, 0),
+                    ('match4', 'game4', 'MCI', 'ARS', 2, 2, 4, 1, 1, 2, 1641254400000, 'FT', 'england virtual', 'X', 1, 1),
                 ]
                 
-                cursor.executemany('''
-                    INSERT INTO matches 
-                    (event_id, game_id, home_team, away_team, home_score, away_score, total_goals, 
-                     ht_home_score, ht_away_score, ht_total_goals, start_time, match_status, 
-                     league, result, over_under_2_5, both_teams_scored)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', sample_matches)
+                bulk_insert(cursor, 'matches', (
+                    'event_id', 'game_id', 'home_team', 'away_team', 'home_score', 'away_score', 'total_goals',
+                    'ht_home_score', 'ht_away_score', 'ht_total_goals', 'start_time', 'match_status',
+                    'league', 'result', 'over_under_2_5', 'both_teams_scored'
+                ), sample_matches)
                 
                 # Add sample scheduled matches
-                import time
                 current_time = int(time.time() * 1000)
                 future_time = current_time + (60 * 60 * 1000)  # 1 hour from now
                 
@@ -123,162 +272,242 @@ def init_database():
                     ('sched2', 'LEE', 'CHE', 'england virtual', future_time + 1800000, '16:00', 'scheduled', 2.8, 3.0, 2.6),
                 ]
                 
-                cursor.executemany('''
-                    INSERT INTO scheduled_matches 
-                    (event_id, home_team, away_team, league, start_time, match_time_display, status, home_odds, draw_odds, away_odds)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', sample_scheduled)
+                bulk_insert(cursor, 'scheduled_matches', (
+                    'event_id', 'home_team', 'away_team', 'league', 'start_time', 'match_time_display',
+                    'status', 'home_odds', 'draw_odds', 'away_odds'
+                ), sample_scheduled)
                 
                 conn.commit()
+                invalidate_cache()
                 print("Sample data added successfully")
+            
+            sync_league_aliases(cursor)
                 
     except sqlite3.Error as e:
         print(f"Database initialization error: {e}")
 
+# Raw league names that have no league_alias row yet
+_NEW_LEAGUE_ALIASES_SQL = '''
+    SELECT league FROM matches
+    UNION
+    SELECT league FROM scheduled_matches
+    EXCEPT
+    SELECT raw FROM league_alias
+'''
+
+_INSERT_LEAGUE_ALIAS_SQL = 'INSERT OR IGNORE INTO league_alias (raw, standardized, display) VALUES (?, ?, ?)'
+
+def sync_league_aliases(cursor):
+    """Add league_alias rows for raw league names not seen before.
+    
+    Only new raw strings go through standardize_league_name, so after
+    startup this is normally a single query that returns nothing.
+    """
+    cursor.execute(_NEW_LEAGUE_ALIASES_SQL)
+    new_aliases = []
+    for (raw,) in cursor.fetchall():
+        if raw:
+            standardized = standardize_league_name(raw)
+            new_aliases.append((raw, standardized, get_display_name(standardized)))
+    if new_aliases:
+        cursor.executemany(_INSERT_LEAGUE_ALIAS_SQL, new_aliases)
+
 # Initialize database on startup
 init_database()
+# SQLite connections must not cross fork(); close the ones init_database
+# opened so a server that forks workers after importing the app
+# (gunicorn --preload) leaves each worker to open its own
+pool.close()
 
 @app.route('/')
 def index():
     """Serve the main page."""
     return render_template('index.html')
 
+# League values already in standard form: the configured leagues plus every
+# value /leagues has handed out, which is what clients send back to us
+_STANDARD_VALUES = set(VIRTUAL_LEAGUES)
+
+def _standardize(league):
+    """Standardize a league name from a URL, skipping the work for known values."""
+    return league if league in _STANDARD_VALUES else standardize_league_name(league)
+
+# Leagues from both completed matches and scheduled matches,
+# deduplicated by standardized name on the database side
+_LEAGUES_SQL = '''
+    SELECT la.standardized, la.display, MIN(la.raw)
+    FROM league_alias la
+    WHERE la.raw IN (
+        -- IN already builds a lookup set, so UNION ALL skips a second dedup pass
+        SELECT league FROM matches WHERE league IS NOT NULL
+        UNION ALL
+        SELECT league FROM scheduled_matches WHERE league IS NOT NULL
+    )
+    GROUP BY la.standardized
+    ORDER BY la.display
+'''
+
+@cached(ttl=60)
+def _leagues_payload():
+    """Build the serialized /leagues body."""
+    with pool.acquire() as conn:
+        cursor = conn.cursor()
+        sync_league_aliases(cursor)
+        cursor.execute(_LEAGUES_SQL)
+        leagues = [{
+            'value': standardized,
+            'display': display,
+            'raw': raw  # For debugging
+        } for standardized, display, raw in cursor]
+    
+    _STANDARD_VALUES.update(league['value'] for league in leagues)
+    
+    return _dumps({
+        'leagues': leagues,
+        'count': len(leagues)
+    })
+
 @app.route('/leagues', methods=['GET'])
 def get_leagues():
     """Return list of available leagues from both completed and scheduled matches."""
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            # Get leagues from both completed matches and scheduled matches
-            cursor.execute('''
-                SELECT DISTINCT league FROM matches
-                UNION
-                SELECT DISTINCT league FROM scheduled_matches
-                ORDER BY league
-            ''')
-            raw_leagues = [row[0] for row in cursor.fetchall() if row[0]]
-            
-            # Standardize and create league objects with display names
-            leagues = []
-            seen_leagues = set()
-            
-            for raw_league in raw_leagues:
-                standardized = standardize_league_name(raw_league)
-                if standardized not in seen_leagues:
-                    seen_leagues.add(standardized)
-                    leagues.append({
-                        'value': standardized,
-                        'display': get_display_name(standardized),
-                        'raw': raw_league  # For debugging
-                    })
-            
-            # Sort by display name
-            leagues.sort(key=lambda x: x['display'])
-            
-        return jsonify({
-            'leagues': leagues,
-            'count': len(leagues)
-        })
+        # The league set changes rarely, so serve a pre-serialized body for up to a minute
+        return Response(_leagues_payload(), mimetype='application/json')
     except sqlite3.Error as e:
-        return jsonify({'error': f'DB Error: {e}'}), 500
+        return {'error': f'DB Error: {e}'}, 500
 
-@app.route('/matches/<league>', methods=['GET'])
-def get_matches(league):
-    """Return SCHEDULED matches for a specific league for predictions."""
-    try:
-        # Standardize the incoming league name
-        standardized_league = standardize_league_name(league)
-        display_league = get_display_name(standardized_league)
+# FIXED: Simplified can_predict logic
+# event_id is UNIQUE, so neither branch needs DISTINCT. The completed
+# branch (pri 2) only runs when there is nothing scheduled, so one
+# round trip returns whichever set the page should show.
+# Each scheduled row carries whether the league holds at least two matches
+# involving either team, each match counted once. Only that threshold
+# matters, so the check is split by side (skipping rows the home side
+# already covers) into EXISTS probes that stop at the first or second row
+# found on the per-team indexes instead of counting every match.
+_MATCHES_SQL = '''
+    SELECT * FROM (
+        SELECT 1 AS pri, s.home_team, s.away_team, s.match_time_display, s.status, s.event_id,
+               EXISTS (SELECT 1 FROM matches m
+                       WHERE m.league = s.league
+                         AND m.home_team IN (s.home_team, s.away_team)
+                       LIMIT 1 OFFSET 1)
+            OR EXISTS (SELECT 1 FROM matches m
+                       WHERE m.league = s.league
+                         AND m.away_team IN (s.home_team, s.away_team)
+                         AND m.home_team NOT IN (s.home_team, s.away_team)
+                       LIMIT 1 OFFSET 1)
+            OR (EXISTS (SELECT 1 FROM matches m
+                        WHERE m.league = s.league
+                          AND m.home_team IN (s.home_team, s.away_team))
+                AND EXISTS (SELECT 1 FROM matches m
+                            WHERE m.league = s.league
+                              AND m.away_team IN (s.home_team, s.away_team)
+                              AND m.home_team NOT IN (s.home_team, s.away_team))) AS has_history
+        FROM scheduled_matches s
+        WHERE s.league = ? AND s.status = 'scheduled'
+        ORDER BY s.home_team, s.away_team
+        LIMIT 50
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 2 AS pri, home_team, away_team, NULL, 'completed', event_id, NULL
+        FROM matches 
+        WHERE league = ? AND NOT EXISTS (
+            SELECT 1 FROM scheduled_matches
+            WHERE league = ? AND status = 'scheduled'
+        )
+        ORDER BY start_time DESC 
+        LIMIT 20
+    )
+'''
+
+@cached(ttl=30)
+def _matches_payload(standardized_league):
+    """Build the serialized /matches body for a standardized league."""
+    display_league = get_display_name(standardized_league)
+    
+    with pool.acquire() as conn:
+        cursor = conn.cursor()
         
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            
-            # FIXED: Simplified can_predict logic
-            cursor.execute('''
-                SELECT DISTINCT s.home_team, s.away_team, s.match_time_display, s.status, s.event_id
-                FROM scheduled_matches s
-                WHERE s.league = ? AND s.status = 'scheduled'
-                ORDER BY s.home_team, s.away_team
-                LIMIT 50
-            ''', (standardized_league,))
-            
-            matches = []
-            for row in cursor.fetchall():
-                home_team, away_team, match_time_display, status, event_id = row
-                
-                # Check if we have historical data for these specific teams
-                cursor.execute('''
-                    SELECT COUNT(*) FROM matches 
-                    WHERE league = ? AND (
-                        (home_team = ? OR away_team = ?) OR
-                        (home_team = ? OR away_team = ?)
-                    )
-                ''', (standardized_league, home_team, home_team, away_team, away_team))
-                
-                historical_count = cursor.fetchone()[0]
-                can_predict = historical_count >= 2  # Need at least 2 historical matches combined
-                
-                print(f"Match: {home_team} vs {away_team} - Historical matches: {historical_count} - Can predict: {can_predict}")
-                
+        cursor.execute(_MATCHES_SQL, (standardized_league, standardized_league, standardized_league))
+        
+        rows = cursor.fetchall()
+        scheduled_rows = [row[1:] for row in rows if row[0] == 1]
+        historical_rows = [row[1:] for row in rows if row[0] == 2]
+        
+        matches = []
+        log_rows = logger.isEnabledFor(logging.DEBUG)
+        for row in scheduled_rows:
+            home_team, away_team, match_time_display, status, event_id, has_history = row
+            
+            # Check if we have historical data for these specific teams
+            can_predict = bool(has_history)  # Need at least 2 historical matches combined
+            
+            if log_rows:
+                logger.debug("Match: %s vs %s - Historical matches: %s - Can predict: %s",
+                             home_team, away_team, "2+" if has_history else "<2", can_predict)
+            
+            matches.append({
+                'home_team': home_team, 
+                'away_team': away_team,
+                'match_time': match_time_display or 'TBD',
+                'status': status,
+                'event_id': event_id,
+                'type': 'scheduled',
+                'can_predict': can_predict,
+                'prediction_note': 'Prediction available' if can_predict else 'Insufficient historical data'
+            })
+        
+        # If no scheduled matches, fall back to recent completed matches for demonstration
+        if not matches:
+            for home_team, away_team, _, _, event_id, _ in historical_rows:
                 matches.append({
                     'home_team': home_team, 
                     'away_team': away_team,
-                    'match_time': match_time_display or 'TBD',
-                    'status': status,
                     'event_id': event_id,
-                    'type': 'scheduled',
-                    'can_predict': can_predict,
-                    'prediction_note': 'Prediction available' if can_predict else 'Insufficient historical data'
+                    'match_time': 'Completed',
+                    'status': 'completed',
+                    'type': 'historical',
+                    'can_predict': True,  # Historical matches always allow prediction
+                    'prediction_note': 'Historical analysis available'
                 })
-            
-            # If no scheduled matches, fall back to recent completed matches for demonstration
-            if not matches:
-                cursor.execute('''
-                    SELECT DISTINCT home_team, away_team, event_id
-                    FROM matches 
-                    WHERE league = ? 
-                    ORDER BY start_time DESC 
-                    LIMIT 20
-                ''', (standardized_league,))
-                
-                for row in cursor.fetchall():
-                    matches.append({
-                        'home_team': row[0], 
-                        'away_team': row[1],
-                        'event_id': row[2],
-                        'match_time': 'Completed',
-                        'status': 'completed',
-                        'type': 'historical',
-                        'can_predict': True,  # Historical matches always allow prediction
-                        'prediction_note': 'Historical analysis available'
-                    })
-        
-        print(f"Returning {len(matches)} matches for {standardized_league}")
-        return jsonify({
-            'matches': matches,
-            'league_display': display_league,
-            'league_standardized': standardized_league
-        })
+    
+    logger.debug("Returning %s matches for %s", len(matches), standardized_league)
+    return _dumps({
+        'matches': matches,
+        'league_display': display_league,
+        'league_standardized': standardized_league
+    })
+
+@app.route('/matches/<league>', methods=['GET'])
+def get_matches(league):
+    """Return SCHEDULED matches for a specific league for predictions."""
+    try:
+        # Standardize the incoming league name
+        standardized_league = _standardize(league)
+        return Response(_matches_payload(standardized_league), mimetype='application/json')
     except sqlite3.Error as e:
-        print(f"DB Error in get_matches: {e}")
-        return jsonify({'error': f'DB Error: {e}'}), 500
+        logger.error("DB Error in get_matches: %s", e)
+        return {'error': f'DB Error: {e}'}, 500
 
 @app.route('/predict/<league>/<home_team>/<away_team>', methods=['GET'])
 def predict_match(league, home_team, away_team):
     """Return prediction for a specific match."""
-    print(f"Flask received: {home_team} vs {away_team} in {league}")
-    print(f"Calling predictor.predict_match...")
+    logger.debug("Flask received: %s vs %s in %s", home_team, away_team, league)
     
     try:
         # Standardize league name for consistent lookups
-        standardized_league = standardize_league_name(league)
-        print(f"Standardized league: {standardized_league}")
+        standardized_league = _standardize(league)
+        logger.debug("Standardized league: %s", standardized_league)
         
+        # Memoized per (home, away, league) until the next data update, so a
+        # repeat request skips the history query and the model entirely
         prediction = predictor.predict_match(home_team, away_team, standardized_league)
         
         if prediction:
-            print("Prediction generated successfully!")
-            return jsonify({
+            logger.debug("Prediction generated successfully!")
+            return _json_response({
                 'prediction': {
                     'home_team': prediction['home_team'],
                     'away_team': prediction['away_team'],
@@ -295,157 +524,181 @@ def predict_match(league, home_team, away_team):
                 }
             })
         else:
-            print("No prediction generated - predictor returned None")
-            return jsonify({'error': 'Prediction unavailable - insufficient historical data'}), 400
+            logger.debug("No prediction generated - predictor returned None")
+            return {'error': 'Prediction unavailable - insufficient historical data'}, 400
             
     except Exception as e:
-        print(f"Error in predict_match: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'Prediction error: {str(e)}'}), 500
+        logger.exception("Error in predict_match: %s", e)
+        return {'error': f'Prediction error: {str(e)}'}, 500
+
+# Saving a table re-inserts its rows under fresh AUTOINCREMENT ids, so
+# (max id, row count) changes whenever the league's table does
+_LEAGUE_TABLE_VERSION_SQL = 'SELECT MAX(id), COUNT(*) FROM league_tables WHERE league_name = ?'
+
+# Shared by both league table routes; goal difference is derived from the goal columns
+_LEAGUE_TABLE_SQL = '''
+    SELECT team_name, position, matches_played, wins, draws, losses, 
+           goals_for, goals_against, goals_for - goals_against AS goal_difference,
+           points, COALESCE(last_5_results, '') AS last_5_results
+    FROM league_tables 
+    WHERE league_name = ? 
+    ORDER BY position
+'''
+
+LEAGUE_TABLE_COLUMNS = [
+    'team_name', 'position', 'matches_played', 'wins', 'draws', 'losses',
+    'goals_for', 'goals_against', 'goal_difference', 'points', 'last_5_results'
+]
+
+# Serialized league tables by league: {league: (etag, body)}
+_league_table_cache = {}
 
 @app.route('/league_table/<league>', methods=['GET'])
 def get_league_table(league):
     """Return league table for a specific league."""
     try:
         # Standardize league name for consistent lookups
-        standardized_league = standardize_league_name(league)
+        standardized_league = _standardize(league)
         display_league = get_display_name(standardized_league)
         
-        with sqlite3.connect(db_path) as conn:
+        with pool.acquire() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT team_name, position, matches_played, wins, draws, losses, 
-                       goals_for, goals_against, goal_difference, points, last_5_results
-                FROM league_tables 
-                WHERE league_name = ? 
-                ORDER BY position
-            ''', (standardized_league,))
-            
-            table = []
-            for row in cursor.fetchall():
-                team_data = {
-                    'team_name': row[0],
-                    'position': row[1],
-                    'matches_played': row[2],
-                    'wins': row[3],
-                    'draws': row[4],
-                    'losses': row[5],
-                    'goals_for': row[6],
-                    'goals_against': row[7],
-                    'goal_difference': row[8],
-                    'points': row[9],
-                    'last_5_results': row[10] or '',
-                    # Add aliases for common field name variations
-                    'MP': row[2],
-                    'W': row[3],
-                    'D': row[4],
-                    'L': row[5],
-                    'GF': row[6],
-                    'GA': row[7],
-                    'GD': row[8],
-                    'Pts': row[9]
-                }
-                table.append(team_data)
-            
-            return jsonify({
-                'league_table': table,
-                'league_display': display_league,
-                'league_standardized': standardized_league
-            })
+            cursor.execute(_LEAGUE_TABLE_VERSION_SQL, (standardized_league,))
+            max_id, row_count = cursor.fetchone()
+            etag = hashlib.sha1(f"{standardized_league}:{max_id}:{row_count}".encode('utf-8')).hexdigest()
+            
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            
+            cached = _league_table_cache.get(standardized_league)
+            if cached and cached[0] == etag:
+                body = cached[1]
+            else:
+                cursor.execute(_LEAGUE_TABLE_SQL, (standardized_league,))
+                
+                table = [dict(zip(LEAGUE_TABLE_COLUMNS, row)) for row in cursor]
+                
+                body = _dumps({
+                    'league_table': table,
+                    'league_display': display_league,
+                    'league_standardized': standardized_league
+                })
+                # The league comes from the URL: keep only leagues that have a
+                # table, and cap the dict the same way cached() does
+                if row_count:
+                    if len(_league_table_cache) >= _CACHE_MAX_ENTRIES:
+                        _league_table_cache.clear()
+                    _league_table_cache[standardized_league] = (etag, body)
+        
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
             
     except sqlite3.Error as e:
-        return jsonify({'error': f'DB Error: {e}'}), 500
+        return {'error': f'DB Error: {e}'}, 500
+
+@app.route('/league_table_compact/<league>', methods=['GET'])
+def get_league_table_compact(league):
+    """Return a league table as column names plus one array per team."""
+    try:
+        standardized_league = _standardize(league)
+        
+        with pool.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_LEAGUE_TABLE_SQL, (standardized_league,))
+            rows = cursor.fetchall()
+        
+        return _json_response({
+            'columns': LEAGUE_TABLE_COLUMNS,
+            'rows': rows,
+            'league_display': get_display_name(standardized_league),
+            'league_standardized': standardized_league
+        })
+    except sqlite3.Error as e:
+        return {'error': f'DB Error: {e}'}, 500
+
+# Per-league distribution for all three tables in one round trip;
+# the table totals are just the sums of their groups
+_DEBUG_COUNTS_SQL = '''
+    SELECT 'scheduled', league, COUNT(*) FROM scheduled_matches GROUP BY league
+    UNION ALL
+    SELECT 'completed', league, COUNT(*) FROM matches GROUP BY league
+    UNION ALL
+    SELECT 'tables', league_name, COUNT(*) FROM league_tables GROUP BY league_name
+'''
+
+# Sample rows and prediction capability for /debug/database; each is small
+# (LIMIT 5, or one row per league)
+_DEBUG_SECTIONS = (
+    # Get sample data
+    ('scheduled_sample', 'SELECT home_team, away_team, league, status FROM scheduled_matches LIMIT 5'),
+    ('completed_sample', 'SELECT home_team, away_team, league, home_score, away_score FROM matches LIMIT 5'),
+    # Check prediction capability
+    # A fixture is predictable when the two teams have met before; build the
+    # set of met pairs (both orientations) once and join against it
+    ('prediction_stats', '''
+        WITH met_pairs AS (
+            SELECT league, home_team AS team_a, away_team AS team_b FROM matches
+            UNION
+            SELECT league, away_team, home_team FROM matches
+        )
+        SELECT s.league, COUNT(*) as scheduled_count,
+               SUM(CASE WHEN p.league IS NOT NULL THEN 1 ELSE 0 END) as predictable_count
+        FROM scheduled_matches s
+        LEFT JOIN met_pairs p
+          ON p.league = s.league AND p.team_a = s.home_team AND p.team_b = s.away_team
+        GROUP BY s.league
+    '''),
+)
 
 @app.route('/debug/database', methods=['GET'])
 def debug_database():
     """Debug endpoint to check what's in the database."""
     try:
-        with sqlite3.connect(db_path) as conn:
+        with pool.acquire() as conn:
             cursor = conn.cursor()
             
-            # Check scheduled matches
-            cursor.execute('SELECT COUNT(*) FROM scheduled_matches')
-            scheduled_count = cursor.fetchone()[0]
-            
-            # Check completed matches  
-            cursor.execute('SELECT COUNT(*) FROM matches')
-            completed_count = cursor.fetchone()[0]
-            
-            # Check league tables
-            cursor.execute('SELECT COUNT(*) FROM league_tables')
-            table_count = cursor.fetchone()[0]
-            
-            # Get league distribution
-            league_info = {}
-            
-            # From scheduled matches
-            cursor.execute('SELECT league, COUNT(*) FROM scheduled_matches GROUP BY league')
-            scheduled_leagues = cursor.fetchall()
-            
-            # From completed matches
-            cursor.execute('SELECT league, COUNT(*) FROM matches GROUP BY league')  
-            completed_leagues = cursor.fetchall()
-            
-            # From league tables
-            cursor.execute('SELECT league_name, COUNT(*) FROM league_tables GROUP BY league_name')
-            table_leagues = cursor.fetchall()
+            cursor.execute(_DEBUG_COUNTS_SQL)
+            by_source = {'scheduled': [], 'completed': [], 'tables': []}
+            for source, league, count in cursor:
+                by_source[source].append((league, count))
             
-            # Create standardized league info
-            all_raw_leagues = set()
-            for leagues_list in [scheduled_leagues, completed_leagues, table_leagues]:
-                for league, count in leagues_list:
-                    all_raw_leagues.add(league)
-            
-            standardized_leagues = []
-            for raw_league in all_raw_leagues:
-                standardized = standardize_league_name(raw_league)
-                display = get_display_name(standardized)
-                standardized_leagues.append({
-                    'raw': raw_league,
-                    'standardized': standardized, 
-                    'display': display
-                })
-            
-            # Get sample data
-            cursor.execute('SELECT home_team, away_team, league, status FROM scheduled_matches LIMIT 5')
-            scheduled_sample = cursor.fetchall()
-            
-            cursor.execute('SELECT home_team, away_team, league, home_score, away_score FROM matches LIMIT 5')
-            completed_sample = cursor.fetchall()
-            
-            # Check prediction capability
-            cursor.execute('''
-                SELECT s.league, COUNT(*) as scheduled_count,
-                       SUM(CASE WHEN EXISTS (
-                           SELECT 1 FROM matches m 
-                           WHERE m.league = s.league 
-                           AND (m.home_team = s.home_team OR m.away_team = s.home_team)
-                           AND (m.home_team = s.away_team OR m.away_team = s.away_team)
-                       ) THEN 1 ELSE 0 END) as predictable_count
-                FROM scheduled_matches s
-                GROUP BY s.league
-            ''')
-            prediction_stats = cursor.fetchall()
-            
-            return jsonify({
-                'database_status': {
-                    'database_path': db_path,
-                    'scheduled_matches_count': scheduled_count,
-                    'completed_matches_count': completed_count,
-                    'league_tables_count': table_count,
-                    'scheduled_sample': scheduled_sample,
-                    'completed_sample': completed_sample,
-                    'standardized_leagues': standardized_leagues,
-                    'prediction_stats': prediction_stats,
-                    'scheduled_by_league': scheduled_leagues,
-                    'completed_by_league': completed_leagues,
-                    'tables_by_league': table_leagues
-                }
-            })
+            # Every section is read before responding, so a database error
+            # becomes the error payload rather than a truncated body
+            sections = {key: cursor.execute(sql).fetchall() for key, sql in _DEBUG_SECTIONS}
             
     except sqlite3.Error as e:
-        return jsonify({'error': f'DB Error: {e}'}), 500
+        return {'error': f'DB Error: {e}'}, 500
+    
+    scheduled_leagues = by_source['scheduled']
+    completed_leagues = by_source['completed']
+    table_leagues = by_source['tables']
+    
+    # Create standardized league info; both name helpers are memoized,
+    # so map() over the distinct raw names is mostly cache hits
+    all_raw_leagues = {league for league, _ in scheduled_leagues + completed_leagues + table_leagues}
+    standardized = list(map(standardize_league_name, all_raw_leagues))
+    standardized_leagues = [
+        {'raw': raw_league, 'standardized': standard, 'display': display}
+        for raw_league, standard, display
+        in zip(all_raw_leagues, standardized, map(get_display_name, standardized))
+    ]
+    
+    return _json_response({
+        'database_status': {
+            'database_path': db_path,
+            'scheduled_matches_count': sum(count for _, count in scheduled_leagues),
+            'completed_matches_count': sum(count for _, count in completed_leagues),
+            'league_tables_count': sum(count for _, count in table_leagues),
+            'standardized_leagues': standardized_leagues,
+            'scheduled_by_league': scheduled_leagues,
+            'completed_by_league': completed_leagues,
+            'tables_by_league': table_leagues,
+            **sections
+        }
+    })
 
 @app.route('/debug')
 def debug_info():
@@ -453,7 +706,7 @@ def debug_info():
         current_dir = os.getcwd()
         files = os.listdir('.')
         db_exists = os.path.exists(db_path)
-        is_writable = os.access('.', os.W_OK)
+        is_writable = _CWD_WRITABLE
         
         return f"""
         <h2>Debug Info</h2>
@@ -467,18 +720,19 @@ def debug_info():
     except Exception as e:
         return f"Debug error: {e}"
 
+# Shared across /debug/test-api calls so repeat probes reuse the pooled
+# keep-alive connection instead of a fresh TCP and TLS handshake
+_http = requests.Session()
+_http.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebDriver/537.36'
+})
+
 @app.route('/debug/test-api')
 def test_api():
     """Test if the SportyBet API is accessible"""
     try:
-        import requests
-        import time  # Add this missing import
-        
         # Test the actual API endpoint your code uses
         url = "https://www.sportybet.com/api/ng/factsCenter/eventResultList"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebDriver/537.36'
-        }
         
         params = {
             'pageNum': 1,
@@ -490,32 +744,44 @@ def test_api():
             '_t': int(time.time() * 1000)
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = _http.get(url, params=params, timeout=10)
         
-        return jsonify({
+        return {
             'status_code': response.status_code,
             'accessible': response.status_code == 200,
             'response_preview': str(response.text)[:500] if response.text else 'No content',
             'url_used': response.url
-        })
+        }
         
     except Exception as e:
-        return jsonify({
+        return {
             'error': str(e),
             'accessible': False
-        })
+        }
+
+# One API client for every /admin/fetch-real-data call, created on first use,
+# so its pooled keep-alive session and page cache outlive a single request
+_api_client = None
+_api_client_lock = threading.Lock()
+
+def _get_api_client():
+    global _api_client
+    with _api_client_lock:
+        if _api_client is None:
+            from api_client import VirtualFootballAPI
+            _api_client = VirtualFootballAPI()
+        return _api_client
 
 @app.route('/admin/fetch-real-data', methods=['POST', 'GET'])
 def fetch_real_data():
     """Fetch real data using your API client"""
     try:
-        from api_client import VirtualFootballAPI, DataProcessor, DatabaseManager, LeagueTableGenerator
-        import time
+        from api_client import DataProcessor, DatabaseManager, LeagueTableGenerator
         
         print("Fetching real data via API...")
         
         # Initialize components
-        api_client = VirtualFootballAPI()
+        api_client = _get_api_client()
         data_processor = DataProcessor() 
         db_manager = DatabaseManager(db_path)
         
@@ -523,14 +789,15 @@ def fetch_real_data():
         all_league_data = api_client.fetch_all_leagues(days_back=0)  # Today's matches
         
         if not all_league_data:
-            return jsonify({
+            return {
                 'success': False, 
                 'error': 'No data returned from API',
                 'leagues_attempted': list(api_client.leagues.keys())
-            })
+            }
         
         total_matches = 0
         results = []
+        table_generator = LeagueTableGenerator()
         
         # Process each league
         for league_name, league_pages in all_league_data.items():
@@ -547,10 +814,9 @@ def fetch_real_data():
                 # Save matches
                 db_manager.save_matches(matches, standardized_league)
                 
-                # Generate league table
-                table_generator = LeagueTableGenerator()
-                for match in matches:
-                    table_generator.add_match(match)
+                # Generate league table, reusing one generator
+                table_generator.reset()
+                table_generator.add_matches(matches)
                 
                 league_table = table_generator.generate_table()
                 if league_table:
@@ -571,21 +837,24 @@ def fetch_real_data():
                     'error': 'No matches processed'
                 })
         
-        return jsonify({
+        db_manager.close()
+        invalidate_cache()
+        
+        return {
             'success': True,
             'total_matches_fetched': total_matches,
             'leagues_processed': len([r for r in results if r['matches'] > 0]),
             'results': results,
             'message': f'Successfully fetched {total_matches} matches from {len(all_league_data)} leagues'
-        })
+        }
         
     except Exception as e:
         import traceback
-        return jsonify({
+        return {
             'success': False,
             'error': str(e),
             'traceback': traceback.format_exc()
-        }), 500
+        }, 500
 
 @app.route('/debug/imports')
 def debug_imports():
@@ -610,30 +879,40 @@ def debug_imports():
     except Exception as e:
         import_status['requests'] = f'Failed: {str(e)}'
     
-    return jsonify(import_status)
+    return import_status
+
+@cached(ttl=5)
+def _health_payload():
+    """Build the serialized /health body; errors propagate and are never cached."""
+    # Test database connection; the count is kept by triggers on matches
+    # (see schema.py), so this is one seek where COUNT(*) would scan the
+    # whole table on every poll
+    with pool.acquire() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT n FROM table_counts WHERE name = 'matches'")
+        row = cursor.fetchone()
+    
+    return _dumps({
+        'status': 'healthy',
+        'database_path': db_path,
+        'matches_count': row[0] if row else 0
+    })
 
 @app.route('/health')
 def health_check():
     """Simple health check endpoint."""
     try:
-        # Test database connection
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM matches')
-            matches_count = cursor.fetchone()[0]
-            
-        return jsonify({
-            'status': 'healthy',
-            'database_path': db_path,
-            'matches_count': matches_count
-        })
+        # Pollers hit this every few seconds; reuse the same body for up to 5s
+        return Response(_health_payload(), mimetype='application/json')
     except Exception as e:
-        return jsonify({
+        return {
             'status': 'unhealthy',
             'error': str(e),
             'database_path': db_path
-        }), 500
+        }, 500
 
 if __name__ == '__main__':
-    print(f"Starting Flask app with database at: {db_path}")
-    app.run(debug=True)
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting Flask app with database at: %s", db_path)
+    # The reloader/debugger is for local development only; use wsgi.py elsewhere
+    app.run(debug=os.environ.get('FLASK_ENV') == 'development', threaded=True)
\ No newline at end of file
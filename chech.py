@@ -1,6 +1,31 @@
+import io
 import os
 import glob
 
+def _iter_files(directory, skip_dir):
+    """Yield (path, name) for each file below directory, pruning directories skip_dir rejects.
+    
+    os.scandir hands back the file type with each entry, so unlike os.walk
+    no extra stat call is made per entry. Like os.walk, a directory that
+    cannot be read is skipped rather than ending the scan.
+    """
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not skip_dir(entry.name):
+                    yield from _iter_files(entry.path, skip_dir)
+            elif entry.is_file():
+                yield entry.path, entry.name
+
+def _read_text(file_path):
+    """Read a whole file as UTF-8 text, skipping undecodable bytes."""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
 def extract_code_files(project_directory='.'):
     """
     Extract all code files from project directory and combine into a single text output.
@@ -8,7 +33,7 @@ def extract_code_files(project_directory='.'):
     """
     
     # File extensions to include
-    code_extensions = ['.py', '.js', '.html', '.css', '.txt', '.json', '.md', '.yml', '.yaml']
+    code_extensions = ('.py', '.js', '.html', '.css', '.txt', '.json', '.md', '.yml', '.yaml')
     
     # Files/directories to exclude
     exclude_patterns = [
@@ -19,60 +44,67 @@ def extract_code_files(project_directory='.'):
         'chech.py'                 # Exclude this script itself
     ]
     
+    # Split the patterns once so each file is checked with a set lookup and
+    # two tuple-based endswith/startswith calls instead of a loop over patterns
+    suffixes = tuple(pattern[1:] for pattern in exclude_patterns if pattern.startswith('*'))
+    prefixes = tuple(pattern[:-1] for pattern in exclude_patterns if pattern.endswith('*'))
+    exact_names = {pattern for pattern in exclude_patterns if '*' not in pattern}
+    dir_fragments = [pattern.replace('*', '') for pattern in exclude_patterns if '*' in pattern]
+    
+    def skip_dir(d):
+        # Skip excluded directories
+        return d in exact_names or any(fragment in d for fragment in dir_fragments)
+    
     # Get all files in directory
     all_files = []
-    for root, dirs, files in os.walk(project_directory):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if not any(pattern.replace('*', '') in d for pattern in exclude_patterns if '*' in pattern)]
-        dirs[:] = [d for d in dirs if d not in ['__pycache__', 'node_modules', '.git', '.vscode']]
-        
-        for file in files:
-            file_path = os.path.join(root, file)
-            # Check if file has allowed extension
-            if any(file.endswith(ext) for ext in code_extensions):
-                # Check if file matches exclude patterns
-                if not any(
-                    (pattern.startswith('*') and file.endswith(pattern[1:])) or 
-                    (pattern.endswith('*') and file.startswith(pattern[:-1])) or
-                    (pattern == file) or
-                    (pattern in file_path)
-                    for pattern in exclude_patterns
-                ):
-                    all_files.append(file_path)
+    for file_path, file in _iter_files(project_directory, skip_dir):
+        # Check if file has allowed extension
+        if not file.endswith(code_extensions):
+            continue
+        # Check if file matches exclude patterns; plain names also match
+        # anywhere in the path, e.g. '.git' in .github/workflows/ci.yml
+        if (file.endswith(suffixes) or file.startswith(prefixes)
+                or any(name in file_path for name in exact_names)):
+            continue
+        all_files.append(file_path)
     
     # Sort files for consistent output
     all_files.sort()
     
     # Extract content
-    combined_content = []
-    combined_content.append("=" * 80)
-    combined_content.append("VIRTUAL FOOTBALL PREDICTION SYSTEM - CODE EXPORT")
-    combined_content.append("=" * 80)
-    combined_content.append(f"Extracted from: {os.path.abspath(project_directory)}")
-    combined_content.append(f"Total files: {len(all_files)}")
-    combined_content.append("=" * 80)
-    combined_content.append("")
+    combined_content = io.StringIO()
+    
+    def emit(line):
+        combined_content.write(line)
+        combined_content.write("\n")
+    
+    emit("=" * 80)
+    emit("VIRTUAL FOOTBALL PREDICTION SYSTEM - CODE EXPORT")
+    emit("=" * 80)
+    emit(f"Extracted from: {os.path.abspath(project_directory)}")
+    emit(f"Total files: {len(all_files)}")
+    emit("=" * 80)
+    emit("")
     
     for file_path in all_files:
         try:
             # Get relative path for cleaner display
             rel_path = os.path.relpath(file_path, project_directory)
             
-            combined_content.append("-" * 60)
-            combined_content.append(f"FILE: {rel_path}")
-            combined_content.append("-" * 60)
+            emit("-" * 60)
+            emit(f"FILE: {rel_path}")
+            emit("-" * 60)
             
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                combined_content.append(content)
+            emit(_read_text(file_path))
             
-            combined_content.append("")  # Empty line between files
+            emit("")  # Empty line between files
             
         except Exception as e:
-            combined_content.append(f"ERROR reading {rel_path}: {e}")
-            combined_content.append("")
+            emit(f"ERROR reading {rel_path}: {e}")
+            emit("")
     
-    return "\n".join(combined_content)
+    # Every section ends with a blank line; drop its trailing newline
+    return combined_content.getvalue()[:-1]
 
 def save_extracted_code(output_file='project_code_export.txt', project_directory='.'):
     """Save extracted code to a file."""
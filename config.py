@@ -1,37 +1,25 @@
 """
 Configuration file for Virtual Football Prediction System - COMPLETE VERSION
 """
+from functools import lru_cache
 
-# League name standardization mapping
+# League name standardization mapping: raw names from Selenium or the API
+# -> standardized names. Keys are lowercase; standardize_league_name lowercases
+# its input first, so title-case and upper-case variants need no entries.
+_LEAGUE_COUNTRIES = ['england', 'spain', 'italy', 'germany', 'france']
 LEAGUE_NAME_MAPPING = {
-    # Raw names from Selenium -> Standardized names
-    'england': 'england virtual',
-    'spain': 'spain virtual', 
-    'italy': 'italy virtual',
-    'germany': 'germany virtual',
-    'france': 'france virtual',
-    
-    # Handle variations you might encounter
-    'england virtual': 'england virtual',
-    'spain virtual': 'spain virtual',
-    'italy virtual': 'italy virtual', 
-    'germany virtual': 'germany virtual',
-    'france virtual': 'france virtual',
-    
-    # Handle title case variations
-    'England': 'england virtual',
-    'Spain': 'spain virtual',
-    'Italy': 'italy virtual',
-    'Germany': 'germany virtual', 
-    'France': 'france virtual',
-    
-    'England Virtual': 'england virtual',
-    'Spain Virtual': 'spain virtual',
-    'Italy Virtual': 'italy virtual',
-    'Germany Virtual': 'germany virtual',
-    'France Virtual': 'france virtual',
+    **{country: f'{country} virtual' for country in _LEAGUE_COUNTRIES},
+    **{f'{country} virtual': f'{country} virtual' for country in _LEAGUE_COUNTRIES},
 }
 
+# The substring fallback only needs keys that can win: a key containing an
+# earlier key is always preceded by that key's match, so it is dropped
+# ('england virtual' never wins over 'england'), leaving one needle per league
+_SUBSTRING_ITEMS = tuple(
+    (raw, standard) for i, (raw, standard) in enumerate(LEAGUE_NAME_MAPPING.items())
+    if not any(earlier in raw for earlier in list(LEAGUE_NAME_MAPPING)[:i])
+)
+
 # Virtual league IDs (from your API)
 VIRTUAL_LEAGUES = {
     'england virtual': 'sv:category:202120001',
@@ -50,6 +38,7 @@ DISPLAY_NAMES = {
     'france virtual': 'France Virtual League'
 }
 
+@lru_cache(maxsize=1024)
 def standardize_league_name(league_name):
     """
     Standardize league names to consistent format.
@@ -59,31 +48,31 @@ def standardize_league_name(league_name):
         
     Returns:
         str: Standardized league name
+    
+    Memoized: it runs once per fetched match and on every web request but
+    only ever sees a handful of distinct raw names.
     """
     if not league_name:
         return 'unknown virtual'
     
     # Clean the input
-    league_name = str(league_name).strip()
+    league_lower = str(league_name).strip().lower()
     
     # Try exact match first
-    if league_name.lower() in LEAGUE_NAME_MAPPING:
-        return LEAGUE_NAME_MAPPING[league_name.lower()]
-    
-    # Try with original case
-    if league_name in LEAGUE_NAME_MAPPING:
-        return LEAGUE_NAME_MAPPING[league_name]
+    standard_name = LEAGUE_NAME_MAPPING.get(league_lower)
+    if standard_name is not None:
+        return standard_name
     
     # If contains any known league name, extract it
-    league_lower = league_name.lower()
-    for raw_name, standard_name in LEAGUE_NAME_MAPPING.items():
-        if raw_name.lower() in league_lower:
+    for raw_name, standard_name in _SUBSTRING_ITEMS:
+        if raw_name in league_lower:
             return standard_name
     
     # Default: make it virtual
-    league_base = league_name.lower().replace('virtual', '').strip()
+    league_base = league_lower.replace('virtual', '').strip()
     return f"{league_base} virtual"
 
+@lru_cache(maxsize=1024)
 def get_display_name(league_name):
     """
     Get display-friendly league name.
@@ -93,6 +82,8 @@ def get_display_name(league_name):
         
     Returns:
         str: Display name
+    
+    Memoized like standardize_league_name.
     """
     if not league_name:
         return "Unknown Virtual League"
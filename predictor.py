@@ -1,6 +1,15 @@
+import logging
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
+from contextlib import contextmanager
+from functools import lru_cache
 import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
 
 def get_db_path():
     """Get the correct database path based on environment."""
@@ -12,244 +21,275 @@ def get_db_path():
         # Use current directory for local development
         return 'virtual_football.db'
 
+# One team's form over its last {limit} matches in a league, aggregated by
+# SQLite into a single row in TEAM_STATS_KEYS order. team_match_facts already
+# holds each match from the team's side, so these are plain sums over a seek
+# on idx_facts_team_league_time.
+_TEAM_FORM_SQL = '''
+    SELECT COUNT(*), SUM(outcome = 'W'), SUM(outcome = 'D'), SUM(outcome = 'L'),
+           SUM(gf), SUM(ga), SUM(btts_yes), SUM(over_2_5)
+    FROM (
+        SELECT outcome, gf, ga, btts_yes, over_2_5
+        FROM team_match_facts
+        WHERE team = :{team} AND league = :league
+        ORDER BY start_time DESC
+        LIMIT {limit}
+    )
+'''
+
+# Everything predict_match needs in one round trip, one row per slice and
+# tagged by which it feeds: each team's form over its last five games, the
+# head-to-head tally over their last five meetings and the fixture's latest
+# scheduled kick-off. Shorter slices are padded with NULLs to the form width.
+# Takes named parameters :league, :home and :away.
+MATCH_HISTORY_SQL = f'''
+    SELECT 'home', * FROM ({_TEAM_FORM_SQL.format(team='home', limit=5)})
+    UNION ALL
+    SELECT 'away', * FROM ({_TEAM_FORM_SQL.format(team='away', limit=5)})
+    UNION ALL
+    SELECT 'h2h', COALESCE(SUM(result = '1'), 0), COALESCE(SUM(result = 'X'), 0),
+           COALESCE(SUM(result = '2'), 0), COUNT(*), NULL, NULL, NULL, NULL
+    FROM (
+        SELECT result
+        FROM matches
+        WHERE ((home_team = :home AND away_team = :away) OR (home_team = :away AND away_team = :home))
+        AND league = :league
+        ORDER BY start_time DESC
+        LIMIT 5
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'sched', start_time, match_time_display, NULL, NULL, NULL, NULL, NULL, NULL
+        FROM scheduled_matches
+        WHERE home_team = :home AND away_team = :away AND league = :league
+        ORDER BY start_time DESC
+        LIMIT 1
+    )
+'''
+
+TEAM_STATS_KEYS = ('matches', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'btts_yes', 'over_2_5')
+
+H2H_STATS_KEYS = ('home_wins', 'draws', 'away_wins', 'total')
+
+# Fixed model weights: each side's win rate counts FORM_WEIGHT, the home side
+# gets HOME_ADVANTAGE on top, and BTTS/Over are called above FLAG_THRESHOLD
+FORM_WEIGHT = 0.6
+HOME_ADVANTAGE = 0.15
+FLAG_THRESHOLD = 0.5
+
+@lru_cache(maxsize=4096)
+def _decide(home_matches, home_wins, home_draws, home_btts, home_over,
+            away_matches, away_wins, away_draws, away_btts, away_over):
+    """The prediction arithmetic on both teams' integer tallies.
+    
+    Returns (result, score, home %, draw %, away %, btts, over_2_5). The
+    inputs are small integers that repeat across fixtures, so results are
+    memoized.
+    """
+    home_matches = max(home_matches, 1)  # Prevent division by zero
+    away_matches = max(away_matches, 1)
+    
+    # Home advantage
+    home_win_prob = home_wins / home_matches * FORM_WEIGHT + HOME_ADVANTAGE
+    away_win_prob = away_wins / away_matches * FORM_WEIGHT
+    draw_prob = (home_draws / home_matches + away_draws / away_matches) / 2
+    
+    # Normalize to ensure probabilities sum to 1; the home advantage keeps
+    # the total positive
+    total = home_win_prob + away_win_prob + draw_prob
+    home_win_prob /= total
+    away_win_prob /= total
+    draw_prob /= total
+    
+    if home_win_prob > away_win_prob and home_win_prob > draw_prob:
+        predicted_result, predicted_score = '1', '2:1'
+    elif away_win_prob > home_win_prob and away_win_prob > draw_prob:
+        predicted_result, predicted_score = '2', '1:2'
+    else:
+        predicted_result, predicted_score = 'X', '1:1'
+    
+    total_matches = home_matches + away_matches
+    btts_rate = (home_btts + away_btts) / total_matches
+    over_rate = (home_over + away_over) / total_matches
+    
+    return (predicted_result, predicted_score,
+            round(home_win_prob * 100, 1), round(draw_prob * 100, 1), round(away_win_prob * 100, 1),
+            'Yes' if btts_rate > FLAG_THRESHOLD else 'No',
+            'Over' if over_rate > FLAG_THRESHOLD else 'Under')
+
 class Predictor:
+    # Results stay valid until the next data update calls invalidate();
+    # the TTL only bounds staleness when nothing does
+    CACHE_TTL = 300
+    CACHE_MAX_ENTRIES = 1024
+    POOL_SIZE = 8
+
     def __init__(self, db_path=None):
         self.db_path = db_path or get_db_path()
+        # LIFO hands out the most recently used, i.e. warmest, connection
+        self._idle = queue.LifoQueue(maxsize=self.POOL_SIZE)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
 
-    def get_team_stats(self, team_name, league, limit=5):
-        """Get team stats with proper connection handling"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                print(f"Looking for team: {team_name} in league: {league}")
-                
-                cursor.execute('''
-                    SELECT home_team, away_team, home_score, away_score, 
-                           over_under_2_5, both_teams_scored, result
-                    FROM matches 
-                    WHERE (home_team = ? OR away_team = ?) AND league = ?
-                    ORDER BY start_time DESC 
-                    LIMIT ?
-                ''', (team_name, team_name, league, limit))
-                
-                matches = cursor.fetchall()
-                print(f"Found {len(matches)} matches for {team_name}")
-                
-                if not matches:
-                    return None
-                
-                # Process matches
-                wins = draws = losses = goals_for = goals_against = btts_yes = over_2_5 = 0
-                
-                for match in matches:
-                    home_team, away_team, home_score, away_score, ou, btts, result = match
-                    is_home = (team_name == home_team)
-                    
-                    # Goals
-                    goals_for += home_score if is_home else away_score
-                    goals_against += away_score if is_home else home_score
-                    
-                    # Results
-                    if result == '1' and is_home:
-                        wins += 1
-                    elif result == '2' and not is_home:
-                        wins += 1
-                    elif result == 'X':
-                        draws += 1
-                    else:
-                        losses += 1
-                    
-                    # BTTS and Over/Under
-                    if btts and btts.lower() == 'yes':
-                        btts_yes += 1
-                    if ou and ou.lower() == 'over':
-                        over_2_5 += 1
-                
-                stats = {
-                    'matches': len(matches),
-                    'wins': wins,
-                    'draws': draws,
-                    'losses': losses,
-                    'goals_for': goals_for,
-                    'goals_against': goals_against,
-                    'btts_yes': btts_yes,
-                    'over_2_5': over_2_5
-                }
-                
-                print(f"Stats for {team_name}: {stats}")
-                return stats
-                
-        except sqlite3.Error as e:
-            print(f"Database error getting team stats for {team_name}: {e}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error getting team stats for {team_name}: {e}")
-            return None
+    def _memoized(self, key, compute):
+        """Return compute() for key, reusing a result younger than CACHE_TTL.
+        
+        None (no data, or a database error) is never cached, so a retry after
+        the data arrives goes back to the database.
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        
+        value = compute()
+        if value is not None:
+            with self._cache_lock:
+                if len(self._cache) >= self.CACHE_MAX_ENTRIES:
+                    for stale_key in [k for k, (expires_at, _) in self._cache.items() if expires_at <= now]:
+                        del self._cache[stale_key]
+                    if len(self._cache) >= self.CACHE_MAX_ENTRIES:
+                        self._cache.clear()
+                self._cache[key] = (now + self.CACHE_TTL, value)
+        return value
 
-    def get_h2h_stats(self, home_team, away_team, league, limit=5):
-        """Get head-to-head stats with proper error handling"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT home_team, away_team, result
-                    FROM matches 
-                    WHERE ((home_team = ? AND away_team = ?) OR (home_team = ? AND away_team = ?)) 
-                    AND league = ?
-                    ORDER BY start_time DESC 
-                    LIMIT ?
-                ''', (home_team, away_team, away_team, home_team, league, limit))
-                
-                matches = cursor.fetchall()
-                home_wins = draws = away_wins = 0
-                
-                for match in matches:
-                    match_home, match_away, result = match
-                    if result == '1':
-                        home_wins += 1
-                    elif result == 'X':
-                        draws += 1
-                    elif result == '2':
-                        away_wins += 1
-                
-                return {
-                    'home_wins': home_wins,
-                    'draws': draws, 
-                    'away_wins': away_wins,
-                    'total': len(matches)
-                }
-                
-        except sqlite3.Error as e:
-            print(f"Database error getting H2H stats for {home_team} vs {away_team}: {e}")
-            return {'home_wins': 0, 'draws': 0, 'away_wins': 0, 'total': 0}
-        except Exception as e:
-            print(f"Unexpected error getting H2H stats for {home_team} vs {away_team}: {e}")
-            return {'home_wins': 0, 'draws': 0, 'away_wins': 0, 'total': 0}
+    def invalidate(self):
+        """Forget every memoized prediction; call after new matches land."""
+        with self._cache_lock:
+            self._cache.clear()
 
-    def get_match_start_time(self, home_team, away_team, league):
-        """Get the actual start time of the match from scheduled_matches table"""
+    @contextmanager
+    def _conn(self):
+        """Lend an idle read-only connection, opening one if none is free.
+        
+        Predictions only read, so connections are opened read-only (mode=ro,
+        plus query_only as a guard) in autocommit mode. They go back on a
+        stack afterwards instead of being tied to a thread: the dev server
+        starts a thread per request, so per-thread connections would be
+        reopened for every /predict. The app and the fetchers keep their own
+        read-write connections and have already put the database in WAL mode.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT start_time, match_time_display
-                    FROM scheduled_matches 
-                    WHERE home_team = ? AND away_team = ? AND league = ?
-                    ORDER BY start_time DESC
-                    LIMIT 1
-                ''', (home_team, away_team, league))
-                
-                result = cursor.fetchone()
-                if result:
-                    start_time_ms, match_time_display = result
-                    # Convert from milliseconds to datetime
-                    start_time = datetime.fromtimestamp(start_time_ms / 1000)
-                    return start_time.strftime('%H:%M'), match_time_display
-                else:
-                    # If no scheduled match found, return current time as fallback
-                    return datetime.now().strftime('%H:%M'), None
-                    
-        except sqlite3.Error as e:
-            print(f"Database error getting match start time: {e}")
-            return datetime.now().strftime('%H:%M GMT'), None
-        except Exception as e:
-            print(f"Unexpected error getting match start time: {e}")
-            return datetime.now().strftime('%H:%M GMT'), None
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            uri = Path(self.db_path).absolute().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA query_only=ON')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA cache_size=-65536')
+            conn.execute('PRAGMA mmap_size=268435456')
+        try:
+            yield conn
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @staticmethod
+    def _start_time_from_row(row):
+        """(HH:MM, match_time_display) for a (start_time, match_time_display) fixture row or None"""
+        if row:
+            start_time_ms, match_time_display = row
+            # Convert from milliseconds to datetime
+            start_time = datetime.fromtimestamp(start_time_ms / 1000)
+            return start_time.strftime('%H:%M'), match_time_display
+        # If no scheduled match found, return current time as fallback
+        return datetime.now().strftime('%H:%M'), None
 
     def predict_match(self, home_team, away_team, league):
+        """Generate prediction, memoized per (home, away, league)"""
+        return self._memoized(('predict', home_team, away_team, league),
+                              lambda: self._compute_prediction(home_team, away_team, league))
+
+    def _compute_prediction(self, home_team, away_team, league):
         """Generate prediction with comprehensive error handling"""
-        print(f"\n=== PREDICTING: {home_team} vs {away_team} [{league}] ===")
+        # Both teams' form, the head-to-head and the kick-off come back in one
+        # query rather than one connection and query per lookup
+        try:
+            with self._conn() as conn:
+                history = conn.execute(MATCH_HISTORY_SQL, {
+                    'league': league, 'home': home_team, 'away': away_team
+                }).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Database error getting match history for %s vs %s: %s", home_team, away_team, e)
+            return None
+        
+        return self._predict_from_history(home_team, away_team, league, history)
+
+    def _predict_from_history(self, home_team, away_team, league, history):
+        """Generate prediction from the MATCH_HISTORY_SQL rows _compute_prediction fetched"""
+        logger.debug("=== PREDICTING: %s vs %s [%s] ===", home_team, away_team, league)
         
         try:
-            home_stats = self.get_team_stats(home_team, league)
-            away_stats = self.get_team_stats(away_team, league)
-            h2h_stats = self.get_h2h_stats(home_team, away_team, league)
-            
-            # Get match start time
-            match_start_time, match_time_display = self.get_match_start_time(home_team, away_team, league)
-            
-            # Check if we got the stats
-            if not home_stats:
-                print(f"❌ No stats found for {home_team}")
-                return None
-            if not away_stats:
-                print(f"❌ No stats found for {away_team}")
-                return None
-                
-            print(f"✅ Got stats for both teams")
-            print(f"Home stats: {home_stats}")
-            print(f"Away stats: {away_stats}")
-            print(f"H2H stats: {h2h_stats}")
-            print(f"Match start time: {match_start_time}")
-            
-            # Calculate probabilities with safety checks
-            home_matches = max(home_stats['matches'], 1)  # Prevent division by zero
-            away_matches = max(away_stats['matches'], 1)
-            
-            home_win_rate = home_stats['wins'] / home_matches
-            away_win_rate = away_stats['wins'] / away_matches
-            home_draw_rate = home_stats['draws'] / home_matches
-            away_draw_rate = away_stats['draws'] / away_matches
-            
-            # Home advantage
-            home_win_prob = home_win_rate * 0.6 + 0.15  # 15% home advantage
-            away_win_prob = away_win_rate * 0.6
-            draw_prob = (home_draw_rate + away_draw_rate) / 2
-            
-            # Normalize to ensure probabilities sum to 1
-            total = home_win_prob + away_win_prob + draw_prob
-            if total > 0:  # Safety check
-                home_win_prob /= total
-                away_win_prob /= total  
-                draw_prob /= total
-            else:
-                # Fallback if all probabilities are 0
-                home_win_prob = away_win_prob = draw_prob = 1/3
+            rows = {side: row for side, *row in history}
             
-            # Determine result
-            if home_win_prob > away_win_prob and home_win_prob > draw_prob:
-                predicted_result = '1'
-                predicted_score = '2:1'
-            elif away_win_prob > home_win_prob and away_win_prob > draw_prob:
-                predicted_result = '2'
-                predicted_score = '1:2'
-            else:
-                predicted_result = 'X'
-                predicted_score = '1:1'
+            # A team with no matches yet comes back as a zero count
+            home_stats, away_stats = (
+                dict(zip(TEAM_STATS_KEYS, rows[side])) if rows[side][0] else None
+                for side in ('home', 'away')
+            )
+            h2h_stats = dict(zip(H2H_STATS_KEYS, rows['h2h']))
+            sched = rows.get('sched')
+            start = self._start_time_from_row(sched[:2] if sched else None)
             
-            # BTTS and Over/Under with safety checks
-            total_matches = home_matches + away_matches
-            btts_rate = (home_stats['btts_yes'] + away_stats['btts_yes']) / total_matches if total_matches > 0 else 0
-            over_rate = (home_stats['over_2_5'] + away_stats['over_2_5']) / total_matches if total_matches > 0 else 0
-            
-            result = {
-                'home_team': home_team,
-                'away_team': away_team,
-                'league': league,
-                'predicted_result': predicted_result,
-                'predicted_score': predicted_score,
-                'home_win_prob': round(home_win_prob * 100, 1),
-                'draw_prob': round(draw_prob * 100, 1),
-                'away_win_prob': round(away_win_prob * 100, 1),
-                'btts': 'Yes' if btts_rate > 0.5 else 'No',
-                'over_2_5': 'Over' if over_rate > 0.5 else 'Under',
-                'match_start_time': match_start_time,  # Add this to the result
-                'match_time_display': match_time_display,  # Add this too for flexibility
-                'home_stats': home_stats,
-                'away_stats': away_stats,
-                'h2h_stats': h2h_stats
-            }
-            
-            print(f"✅ PREDICTION GENERATED!")
-            print(f"Result: {predicted_result} ({predicted_score})")
-            print(f"Probabilities: H:{result['home_win_prob']}% D:{result['draw_prob']}% A:{result['away_win_prob']}%")
-            
-            return result
+            return self._predict_from_stats(home_team, away_team, league, home_stats, away_stats, h2h_stats, start)
             
         except Exception as e:
-            print(f"Error generating prediction for {home_team} vs {away_team}: {e}")
+            logger.error("Error generating prediction for %s vs %s: %s", home_team, away_team, e)
+            return None
+
+    def _predict_from_stats(self, home_team, away_team, league, home_stats, away_stats, h2h_stats, start):
+        """Turn both teams' recent form, their head-to-head record and the
+        fixture's (HH:MM, match_time_display) kick-off into a prediction"""
+        match_start_time, match_time_display = start
+        
+        # Check if we got the stats
+        if not home_stats:
+            logger.debug("No stats found for %s", home_team)
             return None
+        if not away_stats:
+            logger.debug("No stats found for %s", away_team)
+            return None
+            
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Got stats for both teams")
+            logger.debug("Home stats: %s", home_stats)
+            logger.debug("Away stats: %s", away_stats)
+            logger.debug("H2H stats: %s", h2h_stats)
+            logger.debug("Match start time: %s", match_start_time)
+        
+        predicted_result, predicted_score, home_win_prob, draw_prob, away_win_prob, btts, over_2_5 = _decide(
+            home_stats['matches'], home_stats['wins'], home_stats['draws'],
+            home_stats['btts_yes'], home_stats['over_2_5'],
+            away_stats['matches'], away_stats['wins'], away_stats['draws'],
+            away_stats['btts_yes'], away_stats['over_2_5'])
+        
+        result = {
+            'home_team': home_team,
+            'away_team': away_team,
+            'league': league,
+            'predicted_result': predicted_result,
+            'predicted_score': predicted_score,
+            'home_win_prob': home_win_prob,
+            'draw_prob': draw_prob,
+            'away_win_prob': away_win_prob,
+            'btts': btts,
+            'over_2_5': over_2_5,
+            'match_start_time': match_start_time,  # Add this to the result
+            'match_time_display': match_time_display,  # Add this too for flexibility
+            'home_stats': home_stats,
+            'away_stats': away_stats,
+            'h2h_stats': h2h_stats
+        }
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prediction generated: %s (%s)", predicted_result, predicted_score)
+            logger.debug("Probabilities: H:%s%% D:%s%% A:%s%%",
+                         result['home_win_prob'], result['draw_prob'], result['away_win_prob'])
+        
+        return result
 
     def format_prediction(self, prediction):
         """Format prediction output with error handling and correct match time"""
@@ -285,7 +325,7 @@ Key Information:
 {prediction['away_team']} - Last {away_matches} matches: {away_stats.get('wins', 0)}W {away_stats.get('draws', 0)}D {away_stats.get('losses', 0)}L"""
 
         except Exception as e:
-            print(f"Error formatting prediction: {e}")
+            logger.error("Error formatting prediction: %s", e)
             return "Error formatting prediction - please try again."
 
 # Test function with improved error handling
@@ -1,5 +1,6 @@
 from flask import Flask
-from app import app
+from app import app, db_path as DB_PATH, invalidate_cache
+import heapq
 import schedule
 import time
 import threading
@@ -7,15 +8,14 @@ from datetime import datetime
 from simplified_enhanced_fetcher import EnhancedDataFetcher  # Updated import
 import sqlite3
 
-# Initialize enhanced data fetcher
-data_fetcher = EnhancedDataFetcher(get_db_path())
-def get_db_path():
-    """Get the correct database path based on environment."""
-    import os
-    if os.environ.get('VERCEL') or os.environ.get('VERCEL_ENV') or not os.access('.', os.W_OK):
-        return '/tmp/virtual_football.db'
-    else:
-        return 'virtual_football.db'
+# Initialize enhanced data fetcher against the same database as the web app
+data_fetcher = EnhancedDataFetcher(DB_PATH)
+
+# One connection for the scheduler's own queries, shared under a lock rather
+# than reopened on every check
+_db = sqlite3.connect(DB_PATH, check_same_thread=False)
+_db_lock = threading.Lock()
+
 def update_data():
     """Fetch and update both completed and scheduled matches using enhanced fetcher."""
     print(f"Starting FULL data update at {datetime.now()}")
@@ -25,6 +25,7 @@ def update_data():
         success = data_fetcher.run_full_update()
         
         if success:
+            invalidate_cache()
             print("Full data update completed successfully")
         else:
             print("Full data update had some issues - will retry next cycle")
@@ -41,6 +42,9 @@ def update_scheduled_matches_only():
         success = data_fetcher.run_scheduled_update()
         
         if success:
+            # Memoized predictions carry the fixture's kick-off time
+            invalidate_cache()
+            queue_match_checks()
             print("Scheduled matches updated successfully")
         else:
             print("Scheduled matches update failed")
@@ -57,6 +61,8 @@ def update_completed_matches_only():
         success = data_fetcher.run_completed_update()
         
         if success:
+            # New results change every team's form; drop memoized predictions and payloads
+            invalidate_cache()
             print("Completed matches updated successfully via API")
         else:
             print("Completed matches API update failed")
@@ -67,7 +73,7 @@ def update_completed_matches_only():
 def check_for_finished_matches():
     """Check if any matches finished 1 minute ago (31 minutes after start) and trigger update."""
     try:
-        with sqlite3.connect('virtual_football.db') as conn:
+        with _db_lock, _db as conn:
             cursor = conn.cursor()
             
             # Get current time in milliseconds
@@ -77,70 +83,115 @@ def check_for_finished_matches():
             match_end_time_ms = current_time_ms - (31 * 60 * 1000)  # 31 minutes ago
             tolerance_ms = 60 * 1000  # 1 minute tolerance window
             
-            # Find matches that should have finished around this time
+            # Mark matches that should have finished around this time as
+            # processed in one statement; the start check has usually marked
+            # them 'started' by now. RETURNING reports which ones were flipped.
             cursor.execute('''
-                SELECT event_id, home_team, away_team, start_time 
-                FROM scheduled_matches 
+                UPDATE scheduled_matches 
+                SET status = 'finished' 
                 WHERE start_time BETWEEN ? AND ? 
-                AND status = 'scheduled'
+                AND status IN ('scheduled', 'started')
+                RETURNING event_id
             ''', (match_end_time_ms - tolerance_ms, match_end_time_ms + tolerance_ms))
             
             finished_matches = cursor.fetchall()
+            conn.commit()
+        
+        # The fetch runs after the lock and connection are released, so the
+        # write transaction covers only the status flip
+        if finished_matches:
+            print(f"Found {len(finished_matches)} matches that should be finished - triggering update")
+            # Trigger completed matches update to get final results
+            update_completed_matches_only()
             
-            if finished_matches:
-                print(f"Found {len(finished_matches)} matches that should be finished - triggering update")
-                # Trigger completed matches update to get final results
-                update_completed_matches_only()
-                
-                # Mark these matches as processed
-                for match in finished_matches:
-                    cursor.execute('''
-                        UPDATE scheduled_matches 
-                        SET status = 'finished' 
-                        WHERE event_id = ?
-                    ''', (match[0],))
-                conn.commit()
-                
     except Exception as e:
         print(f"Error checking for finished matches: {e}")
 
 def check_for_started_matches():
     """Check if any scheduled matches have started and trigger update 1 minute later."""
     try:
-        with sqlite3.connect('virtual_football.db') as conn:
+        with _db_lock, _db as conn:
             cursor = conn.cursor()
             
             # Get current time in milliseconds
             current_time_ms = int(time.time() * 1000)
             one_minute_ago_ms = current_time_ms - (2 * 60 * 1000)  # 1 minute ago
             
-            # Find matches that started in the last minute
+            # Mark matches that started in the last minute as processed in one
+            # statement, so repeated checks do not trigger them again
             cursor.execute('''
-                SELECT event_id, home_team, away_team, start_time 
-                FROM scheduled_matches 
+                UPDATE scheduled_matches 
+                SET status = 'started' 
                 WHERE start_time BETWEEN ? AND ? 
                 AND status = 'scheduled'
+                RETURNING event_id
             ''', (one_minute_ago_ms, current_time_ms))
             
             started_matches = cursor.fetchall()
+            conn.commit()
+        
+        # The fetch runs after the lock and connection are released, so the
+        # write transaction covers only the status flip
+        if started_matches:
+            print(f"Found {len(started_matches)} matches that just started - triggering update")
+            # Trigger completed matches update to get results
+            update_completed_matches_only()
             
-            if started_matches:
-                print(f"Found {len(started_matches)} matches that just started - triggering update")
-                # Trigger completed matches update to get results
-                update_completed_matches_only()
-                
-                # Mark these matches as processed to avoid repeated updates
-                for match in started_matches:
-                    cursor.execute('''
-                        UPDATE scheduled_matches 
-                        SET status = 'started' 
-                        WHERE event_id = ?
-                    ''', (match[0],))
-                conn.commit()
-                
     except Exception as e:
         print(f"Error checking for started matches: {e}")
 
+# Match checks that are due, as a min-heap of (due_ms, check name). It is
+# rebuilt from scheduled_matches after every fixture update, so the scheduler
+# can sleep until the next kick-off or full time instead of polling the
+# table every minute for windows that are nearly always empty.
+MATCH_END_DELAY_MS = 31 * 60 * 1000  # 30 min match + 1 min buffer, as in check_for_finished_matches
+_pending_checks = []
+_MATCH_CHECKS = {
+    'started': check_for_started_matches,
+    'finished': check_for_finished_matches,
+}
+
+def queue_match_checks():
+    """Rebuild the match-check queue from fixtures that have not finished yet."""
+    now_ms = int(time.time() * 1000)
+    try:
+        with _db_lock, _db as conn:
+            rows = conn.execute('''
+                SELECT DISTINCT start_time, status
+                FROM scheduled_matches
+                WHERE status IN ('scheduled', 'started') AND start_time >= ?
+            ''', (now_ms - MATCH_END_DELAY_MS,)).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error loading scheduled match times: {e}")
+        return
+    
+    checks = set()
+    for start_ms, status in rows:
+        # Each check looks back over a short window; skip ones already missed
+        if status == 'scheduled' and start_ms >= now_ms - 60 * 1000:
+            checks.add((start_ms, 'started'))
+        if start_ms + MATCH_END_DELAY_MS >= now_ms - 60 * 1000:
+            checks.add((start_ms + MATCH_END_DELAY_MS, 'finished'))
+    
+    _pending_checks[:] = checks
+    heapq.heapify(_pending_checks)
+
+def run_due_match_checks():
+    """Run each kind of match check that has come due, at most once per call.
+    
+    Returns the seconds until the next queued check, or None if none is queued.
+    """
+    now_ms = int(time.time() * 1000)
+    due = set()
+    while _pending_checks and _pending_checks[0][0] <= now_ms:
+        due.add(heapq.heappop(_pending_checks)[1])
+    for name in sorted(due, reverse=True):  # 'started' before 'finished'
+        _MATCH_CHECKS[name]()
+    
+    if not _pending_checks:
+        return None
+    return max(0.0, (_pending_checks[0][0] - time.time() * 1000) / 1000)
+
 def run_scheduler():
     """Run data update scheduler in a separate thread with optimized timing."""
     # Schedule different types of updates at different intervals
@@ -154,8 +205,7 @@ def run_scheduler():
     # Completed matches API update every 5 minutes (since it's just API calls, can be more frequent)
     # schedule.every(5).minutes.do(update_completed_matches_only)
     
-    schedule.every(1).minutes.do(check_for_started_matches)
-    schedule.every(1).minutes.do(check_for_finished_matches)
+    # Kick-off and full-time checks run from the match-check queue below
     # Initial data fetch on startup
     print("Running initial data fetch...")
     try:
@@ -173,12 +223,20 @@ def run_scheduler():
     print("- Full update: Every 30 minutes") 
     print("- Scheduled matches (Selenium): Every 10 minutes")
     print("- Completed matches (API): Every 5 minutes")
+    print("- Completed matches (API): At each kick-off and full time")
     print("-" * 50)
     
+    # Also covers fixtures already stored if the initial fetch failed
+    queue_match_checks()
+    
     while True:
         try:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            next_check = run_due_match_checks()
+            # Sleep until the next match check or periodic job, whichever is
+            # sooner, but at least a second and at most a minute
+            delays = [60, schedule.idle_seconds(), next_check]
+            time.sleep(max(1, min(delay for delay in delays if delay is not None)))
         except KeyboardInterrupt:
             print("Scheduler stopped by user")
             break
@@ -0,0 +1,168 @@
+"""
+Tables shared by every process that writes the database - the Flask app,
+api_client.DatabaseManager and the fetchers - and read by the predictor.
+"""
+
+# matches, scheduled_matches and the team_match_facts read model, with the
+# indexes behind Predictor's MATCH_HISTORY_SQL. Whichever process creates the
+# database first creates all of them, so the predictor never meets a file
+# without the tables it reads.
+SCHEMA_DDL = '''
+    CREATE TABLE IF NOT EXISTS matches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id TEXT UNIQUE,
+        game_id TEXT,
+        home_team TEXT,
+        away_team TEXT,
+        home_score INTEGER,
+        away_score INTEGER,
+        total_goals INTEGER,
+        ht_home_score INTEGER,
+        ht_away_score INTEGER,
+        ht_total_goals INTEGER,
+        start_time INTEGER,
+        match_status TEXT,
+        league TEXT,
+        result TEXT,
+        over_under_2_5 INTEGER,
+        both_teams_scored INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS scheduled_matches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id TEXT UNIQUE,
+        home_team TEXT,
+        away_team TEXT,
+        league TEXT,
+        start_time INTEGER,
+        match_time_display TEXT,
+        status TEXT DEFAULT 'scheduled',
+        home_odds REAL DEFAULT 1.0,
+        draw_odds REAL DEFAULT 1.0,
+        away_odds REAL DEFAULT 1.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- One row per team per match, from that team's side (goals for/against,
+    -- W/D/L, flags as 1/0), so form queries need no home/away branching.
+    -- team_match_facts_source derives them from matches; the triggers keep
+    -- the table in step whichever process writes a match, and _MIGRATIONS
+    -- backfills matches stored before the triggers existed.
+    CREATE VIEW IF NOT EXISTS team_match_facts_source AS
+        SELECT event_id, home_team AS team, league, start_time, 1 AS is_home,
+               home_score AS gf, away_score AS ga,
+               CASE result WHEN '1' THEN 'W' WHEN 'X' THEN 'D' ELSE 'L' END AS outcome,
+               lower(both_teams_scored) IN ('yes', '1') AS btts_yes,
+               lower(over_under_2_5) IN ('over', '1') AS over_2_5
+        FROM matches
+        UNION ALL
+        SELECT event_id, away_team, league, start_time, 0,
+               away_score, home_score,
+               CASE result WHEN '2' THEN 'W' WHEN 'X' THEN 'D' ELSE 'L' END,
+               lower(both_teams_scored) IN ('yes', '1'),
+               lower(over_under_2_5) IN ('over', '1')
+        FROM matches;
+    CREATE TABLE IF NOT EXISTS team_match_facts (
+        event_id TEXT,
+        team TEXT,
+        league TEXT,
+        start_time INTEGER,
+        is_home INTEGER,
+        gf INTEGER,
+        ga INTEGER,
+        outcome TEXT,
+        btts_yes INTEGER,
+        over_2_5 INTEGER,
+        PRIMARY KEY (event_id, team)
+    );
+    -- INSERT OR REPLACE on matches fires only the insert trigger, so it
+    -- clears the event's old facts itself (the teams may have changed)
+    CREATE TRIGGER IF NOT EXISTS matches_facts_ai AFTER INSERT ON matches BEGIN
+        DELETE FROM team_match_facts WHERE event_id = NEW.event_id;
+        INSERT OR REPLACE INTO team_match_facts
+        SELECT * FROM team_match_facts_source WHERE event_id = NEW.event_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS matches_facts_au AFTER UPDATE ON matches BEGIN
+        DELETE FROM team_match_facts WHERE event_id = OLD.event_id;
+        INSERT OR REPLACE INTO team_match_facts
+        SELECT * FROM team_match_facts_source WHERE event_id = NEW.event_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS matches_facts_ad AFTER DELETE ON matches BEGIN
+        DELETE FROM team_match_facts WHERE event_id = OLD.event_id;
+    END;
+
+    -- Row count of matches for /health, kept by triggers so reading it is
+    -- one seek instead of a COUNT(*) scan. matches is written with INSERT
+    -- and INSERT OR REPLACE; a replace drops the old row without firing the
+    -- delete trigger, so the before-insert trigger takes it off the count.
+    CREATE TABLE IF NOT EXISTS table_counts (
+        name TEXT PRIMARY KEY,
+        n INTEGER NOT NULL
+    );
+    CREATE TRIGGER IF NOT EXISTS matches_count_bi BEFORE INSERT ON matches
+    WHEN EXISTS (SELECT 1 FROM matches WHERE event_id = NEW.event_id) BEGIN
+        UPDATE table_counts SET n = n - 1 WHERE name = 'matches';
+    END;
+    CREATE TRIGGER IF NOT EXISTS matches_count_ai AFTER INSERT ON matches BEGIN
+        UPDATE table_counts SET n = n + 1 WHERE name = 'matches';
+    END;
+    CREATE TRIGGER IF NOT EXISTS matches_count_ad AFTER DELETE ON matches BEGIN
+        UPDATE table_counts SET n = n - 1 WHERE name = 'matches';
+    END;
+
+    -- Per-team lookups by league, newest first
+    CREATE INDEX IF NOT EXISTS idx_matches_league_home_time
+    ON matches(league, home_team, start_time DESC);
+    CREATE INDEX IF NOT EXISTS idx_matches_league_away_time
+    ON matches(league, away_team, start_time DESC);
+    -- Head-to-head lookups (the h2h slice of MATCH_HISTORY_SQL)
+    CREATE INDEX IF NOT EXISTS idx_matches_league_pair
+    ON matches(league, home_team, away_team, start_time DESC);
+    -- Latest fixture for a pair (the sched slice of MATCH_HISTORY_SQL)
+    CREATE INDEX IF NOT EXISTS idx_sched_league_pair_time
+    ON scheduled_matches(league, home_team, away_team, start_time DESC);
+    -- Per-team form, newest first (the home/away slices of MATCH_HISTORY_SQL)
+    CREATE INDEX IF NOT EXISTS idx_facts_team_league_time
+    ON team_match_facts(team, league, start_time DESC);
+'''
+
+# One-time data fixes, applied in order. PRAGMA user_version records how
+# many a database has had, so each full scan of matches runs once per file
+# rather than on every start. Only ever append: a database's user_version
+# is an index into this tuple.
+_MIGRATIONS = (
+    # team_match_facts for matches stored before its triggers existed
+    'INSERT OR IGNORE INTO team_match_facts SELECT * FROM team_match_facts_source',
+    # Seed the matches count the table_counts triggers keep from here on
+    "INSERT OR REPLACE INTO table_counts (name, n) SELECT 'matches', COUNT(*) FROM matches",
+    # Older databases stored the flags as 'Over'/'Under' and 'Yes'/'No' text.
+    # Their TEXT-declared columns keep 1/0 as '1'/'0', which reads the same.
+    '''UPDATE matches SET over_under_2_5 = (lower(over_under_2_5) = 'over')
+       WHERE lower(over_under_2_5) IN ('over', 'under')''',
+    '''UPDATE matches SET both_teams_scored = (lower(both_teams_scored) = 'yes')
+       WHERE lower(both_teams_scored) IN ('yes', 'no')''',
+)
+
+def ensure_schema(cursor):
+    """Create the shared tables through cursor and apply pending migrations.
+
+    Commits; call it before the caller's own schema work. The migrations run
+    in one write transaction that re-reads user_version, so processes
+    starting together apply each of them once.
+    """
+    conn = cursor.connection
+    cursor.executescript(SCHEMA_DDL)
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
+        for sql in _MIGRATIONS[version:]:
+            cursor.execute(sql)
+        if version < len(_MIGRATIONS):
+            cursor.execute(f'PRAGMA user_version = {len(_MIGRATIONS)}')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
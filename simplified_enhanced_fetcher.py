@@ -1,4 +1,5 @@
 import os
+import re
 import time
 import sqlite3
 from datetime import datetime, timedelta
@@ -20,9 +21,54 @@ except ImportError as e:
     print(f"Import error: {e}")
     print("Please ensure api_client.py is in the same directory")
 
+# Kick-off time inside a schedule row's time text, e.g. '15:34'
+_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})')
+
+# Reads every league section and match row on a schedule page inside the
+# browser and returns them as plain data: [{league, matches: [{time, teams,
+# match_id, score, odds}]}]. Missing elements come back as null so the Python
+# side can apply the same skips and defaults as per-element lookups did.
+_EXTRACT_MATCHES_JS = '''
+    const text = (root, selector) => {
+        const el = root.querySelector(selector);
+        return el ? el.innerText : null;
+    };
+    return Array.from(document.querySelectorAll('.match-league-wrap'), section => {
+        const title = section.querySelector('.league-title');
+        return {
+            league: title ? text(title, '.text') : null,
+            matches: Array.from(section.querySelectorAll('.m-table-row.m-content-row.match-row'), row => {
+                const teams = row.querySelector('.teams');
+                return {
+                    time: text(row, '.time'),
+                    teams: teams ? teams.getAttribute('title') : null,
+                    match_id: teams ? teams.getAttribute('data-match-id') : null,
+                    score: text(row, '.score'),
+                    odds: Array.from(row.querySelectorAll('.m-outcome'), el => el.innerText),
+                };
+            }),
+        };
+    });
+'''
+
+def _pager_selected(page_num):
+    """Wait condition: the pager marks exactly page_num as selected.
+    
+    text_to_be_present_in_element is a substring test, so '1' would also
+    match pages 10-19.
+    """
+    label = str(page_num)
+    def condition(driver):
+        selected = driver.find_elements(By.CSS_SELECTOR, "span.pageNum.selected")
+        return bool(selected) and selected[0].text.strip() == label
+    return condition
+
 class EnhancedDataFetcher:
     """Enhanced data fetcher combining API calls for completed matches and Selenium for scheduled matches."""
     
+    # Shared by every instance; see _chromedriver_path
+    _cached_driver_path = None
+    
     def __init__(self, db_path='virtual_football.db'):
         self.db_path = db_path
         self.driver = None
@@ -31,8 +77,7 @@ class EnhancedDataFetcher:
                 'schedule': 'https://www.sportybet.com/ng/sport/vfootball?time=1',
                 'schedule_12h': 'https://www.sportybet.com/ng/sport/vfootball/today',
             },
-            'retry_delay': 2,
-            'page_load_delay': 3
+            'retry_delay': 2
         }
         self.processed_scheduled = []
         self.existing_scheduled_ids = set()
@@ -54,6 +99,12 @@ class EnhancedDataFetcher:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                # WAL is persisted in the file, so every later connection
+                # (including the app's) gets concurrent readers and cheaper commits
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=NORMAL')
+                cursor.execute('PRAGMA temp_store=MEMORY')
+                
                 # Create scheduled_matches table with all required columns
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS scheduled_matches (
@@ -73,18 +124,48 @@ class EnhancedDataFetcher:
                     )
                 ''')
                 
+                # The 24-hour cleanup deletes by start_time alone. matches
+                # lookups by league and team are already covered by
+                # DatabaseManager's idx_matches_league_* indexes, and event_id
+                # by its UNIQUE constraint.
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_sched_start
+                    ON scheduled_matches(start_time)
+                ''')
+                # Refresh planner statistics only where missing or stale,
+                # not with a full ANALYZE on every fetcher construction
+                cursor.execute('PRAGMA optimize=0x10002')
+                
                 conn.commit()
                 print("Database tables ensured successfully")
         except sqlite3.Error as e:
             print(f"Error ensuring database tables: {e}")
     
+    @classmethod
+    def _chromedriver_path(cls):
+        """Resolve the chromedriver binary once per process.
+        
+        ChromeDriverManager().install() checks the download CDN on every call;
+        later driver starts reuse the path it returned.
+        """
+        if cls._cached_driver_path is None:
+            cls._cached_driver_path = ChromeDriverManager().install()
+        return cls._cached_driver_path
+    
     def initialize_driver(self):
-        """Initialize WebDriver with environment-aware Chrome configuration."""
+        """Initialize WebDriver with environment-aware Chrome configuration.
+        
+        A driver that is already running is reused rather than replaced, so
+        callers can ensure a browser without launching (and leaking) another.
+        """
+        if self.driver is not None:
+            return True
+        
         try:
             chrome_options = ChromeOptions()
             
             # Basic options that work everywhere
-            chrome_options.add_argument("--headless")
+            chrome_options.add_argument("--headless=new")
             chrome_options.add_argument("--disable-gpu")
             chrome_options.add_argument("--no-sandbox")
             chrome_options.add_argument("--disable-dev-shm-usage")
@@ -92,6 +173,21 @@ class EnhancedDataFetcher:
             chrome_options.add_argument("--disable-web-security")
             chrome_options.add_argument("--remote-debugging-port=9222")
             
+            # Scraping needs the DOM, not the pictures: skip image downloads
+            # and decoding, and background work the page never uses.
+            # Stylesheets stay on because extraction reads innerText, which
+            # depends on layout.
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2
+            })
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-background-networking")
+            chrome_options.add_argument("--disable-features=Translate,BackForwardCache")
+            # driver.get returns at DOMContentLoaded; the explicit waits for
+            # the match elements cover anything rendered after that
+            chrome_options.set_capability('pageLoadStrategy', 'eager')
+            
             # Environment-aware Chrome binary detection
             def get_chrome_binary():
                 """Detect Chrome binary based on environment."""
@@ -131,7 +227,7 @@ class EnhancedDataFetcher:
                 chrome_options.binary_location = binary_path
             
             # Initialize the driver
-            service = ChromeService(ChromeDriverManager().install())
+            service = ChromeService(self._chromedriver_path())
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
             
             print("WebDriver initialized successfully")
@@ -147,7 +243,7 @@ class EnhancedDataFetcher:
                 chrome_options.add_argument("--headless")
                 chrome_options.add_argument("--no-sandbox")
                 
-                service = ChromeService(ChromeDriverManager().install())
+                service = ChromeService(self._chromedriver_path())
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 print("Fallback WebDriver initialization successful")
                 return True
@@ -156,6 +252,19 @@ class EnhancedDataFetcher:
                 print(f"Fallback initialization also failed: {fallback_error}")
                 return False
     
+    def _wait_for_schedule(self):
+        """Wait until the schedule's league sections are in the DOM.
+        
+        Returns as soon as they render rather than after a fixed delay; a
+        page with none is left for the extraction step to report.
+        """
+        try:
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, 'match-league-wrap'))
+            )
+        except TimeoutException:
+            pass
+    
     def navigate_to_page(self, page_num: int) -> bool:
         """Navigate to specific page using your logic."""
         if not self.driver:
@@ -165,13 +274,12 @@ class EnhancedDataFetcher:
             # Scroll to top
             self.driver.execute_script("window.scrollTo(0, 0);")
             
-            # Check current page first
+            # Check current page first; the schedule has already loaded, so a
+            # missing pager marker means page 1 rather than something to wait for
+            selected = self.driver.find_elements(By.CSS_SELECTOR, "span.pageNum.selected")
             try:
-                current_page_element = WebDriverWait(self.driver, 5).until(
-                    EC.visibility_of_element_located((By.CSS_SELECTOR, "span.pageNum.selected"))
-                )
-                current_page_num = int(current_page_element.text)
-            except:
+                current_page_num = int(selected[0].text) if selected else 1
+            except ValueError:
                 current_page_num = 1
             
             # Skip if already on target page
@@ -183,10 +291,19 @@ class EnhancedDataFetcher:
                 By.XPATH, f'//span[@class="pageNum" and text()="{page_num}"]'
             )
             
-            self.driver.execute_script("arguments[0].scrollIntoView(true);", page_element)
-            time.sleep(0.5)
+            # Keep a handle on the current page's first league section: the
+            # pager label can change before the rows do, and the old sections
+            # would satisfy _extract_matches_from_page's presence wait
+            old_sections = self.driver.find_elements(By.CLASS_NAME, 'match-league-wrap')
+            
+            # A script click needs no scrolling into view; wait for the old
+            # rows to be replaced and the pager to mark the target page
+            # instead of sleeping a fixed delay
             self.driver.execute_script("arguments[0].click();", page_element)
-            time.sleep(2)
+            wait = WebDriverWait(self.driver, 10, ignored_exceptions=(StaleElementReferenceException,))
+            if old_sections:
+                wait.until(EC.staleness_of(old_sections[0]))
+            wait.until(_pager_selected(page_num))
             return True
             
         except Exception as e:
@@ -194,25 +311,30 @@ class EnhancedDataFetcher:
             return False
     
     def _load_existing_scheduled_ids(self):
-        """Load existing scheduled match IDs from database to prevent duplicates."""
+        """Load stored scheduled match IDs so the fetch can report which fixtures are new.
+        
+        Only fixtures that have not kicked off yet can reappear on the
+        schedule pages, so older rows are left out (a range on idx_sched_start).
+        Duplicates are not this set's job: save_to_database upserts on
+        event_id, so a fixture stored earlier is refreshed in place.
+        """
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT event_id FROM scheduled_matches')
+                cursor.execute('SELECT event_id FROM scheduled_matches WHERE start_time >= ?',
+                               (int(time.time() * 1000),))
                 self.existing_scheduled_ids = {row[0] for row in cursor.fetchall()}
                 print(f"Loaded {len(self.existing_scheduled_ids)} existing scheduled match IDs")
         except sqlite3.Error as e:
             print(f"Error loading existing scheduled IDs: {e}")
             self.existing_scheduled_ids = set()
     
-    def _clean_old_scheduled_matches(self):
-        """Clean up old scheduled matches that might be outdated."""
+    def _prune_scheduled(self, cutoff_ms):
+        """Delete scheduled matches that kicked off before cutoff_ms (a range on idx_sched_start)."""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                # Remove scheduled matches older than 24 hours
-                cutoff_time = (datetime.now() - timedelta(hours=24)).timestamp() * 1000
-                cursor.execute('DELETE FROM scheduled_matches WHERE start_time < ?', (cutoff_time,))
+                cursor.execute('DELETE FROM scheduled_matches WHERE start_time < ?', (cutoff_ms,))
                 deleted_count = cursor.rowcount
                 conn.commit()
                 if deleted_count > 0:
@@ -231,9 +353,11 @@ class EnhancedDataFetcher:
         
         wait = WebDriverWait(self.driver, 10)
         self.driver.get(self.config['urls']['schedule'])
-        time.sleep(self.config['page_load_delay'])
+        self._wait_for_schedule()
         
         all_scheduled_matches = []
+        seen_ids = set()
+        new_count = 0
         
         try:
             # Get total available pages
@@ -254,7 +378,7 @@ class EnhancedDataFetcher:
                 # Navigate to page (skip for first page)
                 if page_num > 1:
                     self.driver.get(self.config['urls']['schedule'])
-                    time.sleep(self.config['page_load_delay'])
+                    self._wait_for_schedule()
                     if not self.navigate_to_page(page_num):
                         print(f"Failed to navigate to page {page_num}, stopping")
                         break
@@ -262,17 +386,26 @@ class EnhancedDataFetcher:
                 # Extract matches from this page
                 page_matches = self._extract_matches_from_page()
                 
-                # Filter out duplicates
-                new_matches = [match for match in page_matches if match['event_id'] not in self.existing_scheduled_ids]
-                
-                all_scheduled_matches.extend(new_matches)
+                # Keep each fixture once per run (a later page or a repeat within
+                # the page is skipped); fixtures already stored are kept too,
+                # so save_to_database can refresh their odds and kick-off
+                page_by_id = {}
+                for match in page_matches:
+                    page_by_id.setdefault(match['event_id'], match)
+                fresh_ids = page_by_id.keys() - seen_ids
+                seen_ids |= fresh_ids
+                all_scheduled_matches.extend(
+                    match for event_id, match in page_by_id.items() if event_id in fresh_ids
+                )
+                page_new = len(fresh_ids - self.existing_scheduled_ids)
+                new_count += page_new
                 
-                print(f"Extracted {len(page_matches)} matches from page {page_num}, {len(new_matches)} are new")
+                print(f"Extracted {len(page_matches)} matches from page {page_num}, {page_new} are new")
                 
         except Exception as e:
             print(f"Error fetching scheduled matches: {e}")
         
-        print(f"Total new scheduled matches fetched: {len(all_scheduled_matches)}")
+        print(f"Total scheduled matches fetched: {len(all_scheduled_matches)} ({new_count} new)")
         self.processed_scheduled = all_scheduled_matches
         return all_scheduled_matches
     
@@ -281,19 +414,15 @@ class EnhancedDataFetcher:
         print("Fetching completed matches via API...")
         
         try:
-            # Use your existing API client to fetch all leagues
-            all_league_data = self.api_client.fetch_all_leagues(days_back=0)  # Today only
-            
-            if not all_league_data:
-                print("No completed match data fetched from API")
-                return False
-            
-            print(f"Successfully fetched data from {len(all_league_data)} leagues via API")
-            
             total_matches_processed = 0
-            
-            # Process each league
-            for league_name, league_pages in all_league_data.items():
+            leagues_fetched = 0
+            table_generator = LeagueTableGenerator()
+            
+            # The API client fetches all leagues concurrently (today only) and
+            # yields each one as it completes, so a league is processed and
+            # saved here, on this thread, while the others are still downloading
+            for league_name, league_pages in self.api_client.iter_all_leagues(days_back=0):
+                leagues_fetched += 1
                 print(f"Processing {league_name.title()} League via API...")
                 
                 matches = self.data_processor.process_league_pages(league_pages)
@@ -315,11 +444,9 @@ class EnhancedDataFetcher:
                 standardized_league_name = standardize_league_name(league_name)
                 self.db_manager.save_matches(matches, standardized_league_name)
                 
-                # Generate and save league table
-                table_generator = LeagueTableGenerator()
-                
-                for match in matches:
-                    table_generator.add_match(match)
+                # Generate and save league table, reusing one generator
+                table_generator.reset()
+                table_generator.add_matches(matches)
                 
                 league_table = table_generator.generate_table()
                 self.db_manager.save_league_table(league_table, standardized_league_name)
@@ -327,6 +454,11 @@ class EnhancedDataFetcher:
                 total_matches_processed += len(matches)
                 print(f"Processed {len(matches)} matches for {standardized_league_name}")
             
+            if not leagues_fetched:
+                print("No completed match data fetched from API")
+                return False
+            
+            print(f"Successfully fetched data from {leagues_fetched} leagues via API")
             print(f"Total completed matches processed via API: {total_matches_processed}")
             return True
             
@@ -337,13 +469,10 @@ class EnhancedDataFetcher:
 
     def _parse_time_to_timestamp(self, time_str):
         """Convert time string like '15:34' to proper future timestamp"""
-        from datetime import datetime, timedelta
-        import re
-        
         if not time_str or time_str == "Pre-match":
             return int((time.time() + 600) * 1000)
         
-        time_match = re.search(r'(\d{1,2}):(\d{2})', time_str)
+        time_match = _TIME_RE.search(time_str)
         if time_match:
             hour = int(time_match.group(1))
             minute = int(time_match.group(2))
@@ -365,17 +494,21 @@ class EnhancedDataFetcher:
         page_matches = []
         
         try:
-            # Find all league sections
-            league_sections = wait.until(
+            # Wait for the league sections, then read every match on the page
+            # in one script call instead of several WebDriver round trips per match
+            wait.until(
                 EC.presence_of_all_elements_located((By.CLASS_NAME, 'match-league-wrap'))
             )
+            league_sections = self.driver.execute_script(_EXTRACT_MATCHES_JS)
             
             # Extract matches from each league section
             for league_section in league_sections:
                 try:
                     # Get league name
-                    league_title_element = league_section.find_element(By.CLASS_NAME, 'league-title')
-                    raw_league_name = league_title_element.find_element(By.CLASS_NAME, 'text').text.strip()
+                    raw_league_name = league_section['league']
+                    if raw_league_name is None:
+                        raise ValueError("league section has no title")
+                    raw_league_name = raw_league_name.strip()
                     
                     # CRITICAL FIX: Standardize the league name immediately
                     standardized_league_name = standardize_league_name(raw_league_name)
@@ -383,70 +516,49 @@ class EnhancedDataFetcher:
                     if self.debug:
                         print(f"League name processing: '{raw_league_name}' -> '{standardized_league_name}'")
                     
-                    # Get all matches in this league
-                    league_matches = league_section.find_elements(By.CLASS_NAME, 'm-table-row.m-content-row.match-row')
-                    
                     # Extract data for each match
-                    for match in league_matches:
+                    for match in league_section['matches']:
                         try:
-                            # Extract game details using your exact selectors
-                            try:
-                                match_time1 = match.find_element(By.CLASS_NAME, 'time').text.replace('\n', '')
-                                match_time = match.find_element(By.CLASS_NAME, 'time').text.replace('\n', '')
-                                match_time = self._parse_time_to_timestamp(match_time)
-                            except:
-                                match_time = "Pre-match"
+                            if match['time'] is None:
+                                raise ValueError("match row has no time")
+                            match_time = self._parse_time_to_timestamp(match['time'].replace('\n', ''))
                             
-                            teams_title = match.find_element(By.CLASS_NAME, 'teams').get_attribute('title')
+                            teams_title = match['teams']
                             
-                            # Parse team names
-                            if ' vs ' in teams_title:
-                                home_team, away_team = teams_title.split(' vs ')
-                            else:
-                                # Handle other possible formats
-                                teams = teams_title.split(' - ')
-                                if len(teams) >= 2:
-                                    home_team, away_team = teams[0], teams[1]
-                                else:
+                            # Parse team names ("Home vs Away", or "Home - Away")
+                            home_team, sep, away_team = teams_title.partition(' vs ')
+                            if not sep:
+                                home_team, sep, away_team = teams_title.partition(' - ')
+                                if not sep:
                                     continue  # Skip if can't parse teams
                             
-                            # Create unique match ID to prevent duplicates
-                            # normalized_time = match_time.replace(':', '').replace(' ', '') if match_time != "Pre-match" else "prematch"
-                            normalized_time = match_time if match_time != "Pre-match" else "prematch"
-                            unique_match_id = f"{home_team.strip()}_{away_team.strip()}_{standardized_league_name}_{normalized_time}"
-                            
-                            # Get match ID from element or use our generated one
-                            try:
-                                element_match_id = match.find_element(By.CLASS_NAME, 'teams').get_attribute('data-match-id')
-                                if element_match_id:
-                                    match_id = element_match_id
-                                else:
-                                    match_id = unique_match_id
-                            except:
-                                match_id = unique_match_id
+                            # Create unique match ID to prevent duplicates;
+                            # prefer the match ID on the element when it has one
+                            unique_match_id = f"{home_team.strip()}_{away_team.strip()}_{standardized_league_name}_{match_time}"
+                            match_id = match['match_id'] or unique_match_id
                             
                             # For scheduled games, we might not have scores yet
                             try:
-                                score_text = match.find_element(By.CLASS_NAME, 'score').text
+                                score_text = match['score']
                                 if score_text and '-' in score_text:
                                     score_parts = score_text.split('-')
                                     home_score = int(score_parts[0].strip())
                                     away_score = int(score_parts[1].strip())
                                 else:
                                     home_score, away_score = 0, 0
-                            except:
+                            except ValueError:
                                 home_score, away_score = 0, 0
                             
                             # Get odds if available
                             try:
-                                odds_elements = match.find_elements(By.CLASS_NAME, 'm-outcome')
-                                if len(odds_elements) >= 3:
-                                    home_odds = float(odds_elements[0].text) if odds_elements[0].text else 1.0
-                                    draw_odds = float(odds_elements[1].text) if odds_elements[1].text else 1.0
-                                    away_odds = float(odds_elements[2].text) if odds_elements[2].text else 1.0
+                                odds_texts = match['odds']
+                                if len(odds_texts) >= 3:
+                                    home_odds = float(odds_texts[0]) if odds_texts[0] else 1.0
+                                    draw_odds = float(odds_texts[1]) if odds_texts[1] else 1.0
+                                    away_odds = float(odds_texts[2]) if odds_texts[2] else 1.0
                                 else:
                                     home_odds = draw_odds = away_odds = 1.0
-                            except:
+                            except ValueError:
                                 home_odds = draw_odds = away_odds = 1.0
                             
                             # Create match data with STANDARDIZED league name
@@ -455,8 +567,8 @@ class EnhancedDataFetcher:
                                 'home_team': home_team.strip(),
                                 'away_team': away_team.strip(),
                                 'league': standardized_league_name,  # Use standardized name here
-                                'start_time': self._parse_time_to_timestamp(match_time1),  
-                                'match_time_display': datetime.fromtimestamp(match_time / 1000),
+                                'start_time': match_time,
+                                'match_time_display': time.strftime('%H:%M', time.localtime(match_time / 1000)),
                                 'home_score': home_score,
                                 'away_score': away_score,
                                 'home_odds': home_odds,
@@ -485,14 +597,14 @@ class EnhancedDataFetcher:
             # Try to refresh page on error
             try:
                 self.driver.refresh()
-                time.sleep(self.config['page_load_delay'])
-            except:
+                self._wait_for_schedule()
+            except Exception:
                 pass
                 
         return page_matches
     
     def save_to_database(self):
-        """Save scheduled matches to database with duplicate prevention."""
+        """Save scheduled matches to database, refreshing fixtures already stored."""
         if not self.processed_scheduled:
             print("No scheduled matches to save")
             return
@@ -501,41 +613,49 @@ class EnhancedDataFetcher:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                # Clean old scheduled matches first
-                self._clean_old_scheduled_matches()
-                
-                # Save scheduled matches with duplicate checking
-                new_scheduled_count = 0
-                for match in self.processed_scheduled:
-                    try:
-                        # Ensure league name is standardized before saving
-                        standardized_league = standardize_league_name(match['league'])
-                        
-                        cursor.execute('''
-                            INSERT OR IGNORE INTO scheduled_matches 
-                            (event_id, home_team, away_team, league, start_time, status, match_time_display, home_odds, draw_odds, away_odds)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            match['event_id'],
-                            match['home_team'],
-                            match['away_team'],
-                            standardized_league,  # Use standardized name
-                            match['start_time'],
-                            match.get('status', 'scheduled'),
-                            match.get('match_time_display', ''),
-                            match.get('home_odds', 1.0),
-                            match.get('draw_odds', 1.0),
-                            match.get('away_odds', 1.0)
-                        ))
-                        if cursor.rowcount > 0:  # New row was inserted
-                            new_scheduled_count += 1
-                            if self.debug:
-                                print(f"  Saved: {match['home_team']} vs {match['away_team']} [{standardized_league}]")
-                    except sqlite3.Error as e:
-                        print(f"Error saving scheduled match {match['event_id']}: {e}")
-                        continue
-                
-                print(f"Saved {new_scheduled_count} new scheduled matches (filtered {len(self.processed_scheduled) - new_scheduled_count} duplicates)")
+                # _extract_matches_from_page already stored the standardized
+                # league name on every match
+                rows = [(
+                    match['event_id'],
+                    match['home_team'],
+                    match['away_team'],
+                    match['league'],
+                    match['start_time'],
+                    match.get('status', 'scheduled'),
+                    match.get('match_time_display', ''),
+                    match.get('home_odds', 1.0),
+                    match.get('draw_odds', 1.0),
+                    match.get('away_odds', 1.0)
+                ) for match in self.processed_scheduled]
+                
+                # One prepared statement for the whole batch, in one transaction.
+                # A fixture already stored (UNIQUE event_id) gets its odds and
+                # kick-off refreshed in place, and only when they changed; its
+                # status is left alone.
+                cursor.execute('SELECT COUNT(*) FROM scheduled_matches')
+                count_before = cursor.fetchone()[0]
+                cursor.executemany('''
+                    INSERT INTO scheduled_matches 
+                    (event_id, home_team, away_team, league, start_time, status, match_time_display, home_odds, draw_odds, away_odds)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(event_id) DO UPDATE SET
+                        start_time = excluded.start_time,
+                        match_time_display = excluded.match_time_display,
+                        home_odds = excluded.home_odds,
+                        draw_odds = excluded.draw_odds,
+                        away_odds = excluded.away_odds,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE start_time IS NOT excluded.start_time
+                       OR home_odds IS NOT excluded.home_odds
+                       OR draw_odds IS NOT excluded.draw_odds
+                       OR away_odds IS NOT excluded.away_odds
+                ''', rows)
+                changed_count = cursor.rowcount
+                cursor.execute('SELECT COUNT(*) FROM scheduled_matches')
+                new_scheduled_count = cursor.fetchone()[0] - count_before
+                
+                print(f"Saved {new_scheduled_count} new scheduled matches, refreshed {changed_count - new_scheduled_count} "
+                      f"(unchanged {len(rows) - changed_count})")
                 conn.commit()
                 
         except sqlite3.Error as e:
@@ -543,19 +663,7 @@ class EnhancedDataFetcher:
     
     def cleanup_old_scheduled_matches(self):
         """Remove scheduled matches that have already started"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                current_time_ms = int(time.time() * 1000)
-                
-                cursor.execute('DELETE FROM scheduled_matches WHERE start_time < ?', (current_time_ms,))
-                deleted = cursor.rowcount
-                conn.commit()
-                
-                if deleted > 0:
-                    print(f"Cleaned up {deleted} old scheduled matches")
-        except Exception as e:
-            print(f"Error cleaning up old matches: {e}")
+        self._prune_scheduled(int(time.time() * 1000))
 
 
     def run_full_update(self):
@@ -565,6 +673,9 @@ class EnhancedDataFetcher:
         success = True
         
         try:
+            # Drop fixtures more than a day old once, before anything is fetched
+            self._prune_scheduled(int((time.time() - 24 * 60 * 60) * 1000))
+            
             # First, fetch completed matches via API (no Selenium needed)
             print("1. Fetching completed matches via API...")
             api_success = self.fetch_completed_matches_via_api()
@@ -572,7 +683,8 @@ class EnhancedDataFetcher:
                 print("API fetch failed, but continuing with scheduled matches")
                 success = False
             
-            # Then, fetch scheduled matches via Selenium
+            # Then, fetch scheduled matches via Selenium; the browser is only
+            # started here, after the API step that does not need it
             print("2. Fetching scheduled matches via Selenium...")
             if not self.initialize_driver():
                 print("Failed to initialize driver for scheduled matches")
@@ -654,6 +766,10 @@ class EnhancedDataFetcher:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                # One read transaction, so the league counts and the pair
+                # lookups below all see the same snapshot
+                cursor.execute('BEGIN')
+                
                 print("\n" + "="*60)
                 print("DATABASE STATUS AFTER UPDATE:")
                 print("="*60)
@@ -671,10 +787,15 @@ class EnhancedDataFetcher:
                 cursor.execute('''
                     SELECT s.league, s.home_team, s.away_team,
                            CASE WHEN EXISTS (
-                               SELECT 1 FROM matches m 
-                               WHERE m.league = s.league 
-                               AND (m.home_team = s.home_team OR m.away_team = s.home_team)
-                               AND (m.home_team = s.away_team OR m.away_team = s.away_team)
+                               -- The pair in either order, as two lookups on
+                               -- idx_matches_league_pair instead of an OR scan
+                               SELECT 1 FROM matches m
+                               WHERE m.league = s.league
+                               AND m.home_team = s.home_team AND m.away_team = s.away_team
+                               UNION ALL
+                               SELECT 1 FROM matches m
+                               WHERE m.league = s.league
+                               AND m.home_team = s.away_team AND m.away_team = s.home_team
                            ) THEN 'YES' ELSE 'NO' END as can_predict
                     FROM scheduled_matches s
                     ORDER BY can_predict DESC, s.league, s.home_team
@@ -696,7 +817,7 @@ class EnhancedDataFetcher:
         if hasattr(self, 'driver') and self.driver:
             try:
                 self.driver.quit()
-            except:
+            except Exception:
                 pass
 
 if __name__ == '__main__':
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for running the app under gunicorn.
+
+    gunicorn -k gthread -w 4 --threads 8 wsgi:app
+
+Threaded workers suit this app: SQLite releases the GIL while it works, and
+requests borrow connections from a shared pool (see app.ConnectionPool).
+--preload is safe too: the app closes the pool's connections once its
+startup schema work is done, so forked workers inherit no open SQLite handles.
+"""
+from app import app
+
+if __name__ == '__main__':
+    app.run()